@@ -6,10 +6,12 @@ Generate a second report for the latest variant only report
 """
 
 import re
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from functools import lru_cache
+from operator import attrgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, TypedDict
 
 import jinja2
 from cloudpathlib.anypath import to_anypath
@@ -21,19 +23,12 @@ from talos.static_values import get_logger
 DATE_REGEX = re.compile(r'(\d{4}-\d{2}-\d{2})')
 
 JINJA_TEMPLATE_DIR = Path(__file__).absolute().parent.parent / 'templates'
+# all visible projects and their reports, in one round trip
 PROJECT_QUERY = gql(
     """
     query MyQuery {
         myProjects {
             dataset
-        }
-    }
-    """,
-)
-REPORT_QUERY = gql(
-    """
-    query MyQuery($project: String!) {
-        project(name: $project) {
             analyses(active: {eq: true}, type:  {eq: "aip-report"}) {
                 outputs
                 meta
@@ -52,6 +47,15 @@ INDEX_HOME = 'gs://cpg-common-test-web/reanalysis/{}'
 script_logger = get_logger(logger_name=__file__)
 
 
+class SequencingTypeReports(TypedDict):
+    """
+    the binned report paths for one sequencing type in one project
+    """
+
+    latest: set[str]
+    general: str | None
+
+
 @dataclass
 class Report:
     """
@@ -66,40 +70,61 @@ class Report:
 
 
 @lru_cache(1)
-def get_my_projects() -> set[str]:
+def get_my_projects() -> dict[str, list[dict[str, Any]]]:
     """
-    queries metamist for projects I have access to,
-    returns the dataset names
+    queries metamist for projects I have access to, and the active reports in each
+    the projects and their analyses are fetched together, so there's no per-project follow-up query
+
+    Returns:
+        the dataset names, each with the raw analysis entries for that dataset
     """
     response: dict[str, Any] = query(PROJECT_QUERY)
-    all_projects = {dataset['dataset'] for dataset in response['myProjects']}
-    script_logger.info(f'Running for projects: {", ".join(sorted(all_projects))}')
+    all_projects = {dataset['dataset']: dataset['analyses'] for dataset in response['myProjects']}
+    script_logger.info('Running for projects: %s', ', '.join(sorted(all_projects)))
     return all_projects
 
 
-def get_project_analyses(project: str) -> dict[str, dict[str, set[str] | str]]:
+@lru_cache(1)
+def get_index_template() -> jinja2.Template:
+    """
+    build the Jinja environment and parse the index template once, shared by every page rendered
+    the compiled template is cached on disk, so repeat runs on the same host skip compilation
+    autoescaping stays on - titles and addresses are derived from bucket paths, not trusted HTML
+    """
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(JINJA_TEMPLATE_DIR),
+        autoescape=True,
+        auto_reload=False,
+        bytecode_cache=jinja2.FileSystemBytecodeCache(),
+    )
+    return env.get_template('report_index.html.jinja')
+
+
+def bin_project_analyses(all_analyses: list[dict[str, Any]]) -> dict[str, SequencingTypeReports]:
     """
-    find all the active analysis entries for this project
-    bin as regular or latest-only
+    bin the active analysis entries for a project as regular or latest-only
     we only want one regular report, but we want to be able to find all latest editions
 
     Args:
-        project (str): project to query for
+        all_analyses (list[dict]): the analysis entries returned by metamist for one project
     """
 
     # general is a single report or none, latest is a set of reports
-    project_reports: dict[str, Any] = {
+    project_reports: dict[str, SequencingTypeReports] = {
         'exome': {'latest': set(), 'general': None},
         'genome': {'latest': set(), 'general': None},
     }
-    all_analyses = query(REPORT_QUERY, variables={'project': project})['project']['analyses']
     for analysis in all_analyses:
-        # get the type or skip (outdated)
-        if not (st := analysis['meta'].get('sequencing_type')):
+        # get the type or skip (outdated, or a sequencing type we don't index)
+        if (st := analysis['meta'].get('sequencing_type')) not in project_reports:
             continue
 
-        # get the output path, allow for old analysis entries
-        output_path = analysis['outputs'] if isinstance(analysis['outputs'], str) else analysis['outputs']['path']
+        # get the output path, allow for old analysis entries, skip entries with no output recorded
+        if not (outputs := analysis.get('outputs')):
+            continue
+        output_path = outputs if isinstance(outputs, str) else outputs.get('path')
+        if not output_path:
+            continue
 
         if 'latest' in output_path:
             project_reports[st]['latest'].add(output_path)
@@ -109,56 +134,113 @@ def get_project_analyses(project: str) -> dict[str, dict[str, set[str] | str]]:
     return project_reports
 
 
-def main() -> None:
+def get_all_project_analyses() -> dict[str, dict[str, SequencingTypeReports]]:
+    """
+    find and bin the active analysis entries for every project I have access to
+    projects without any active reports are dropped here, before any binning or bucket globbing
+    """
+    return {project: bin_project_analyses(analyses) for project, analyses in get_my_projects().items() if analyses}
+
+
+def reports_from_paths(paths: Iterable[str], cohort: str, sequencing_type: str) -> Iterator[Report]:
+    """
+    build a Report for each dated report path, skipping any path without a date
+
+    Args:
+        paths (Iterable[str]): report paths in the cohort's web bucket
+        cohort (str): the dataset these reports belong to
+        sequencing_type (str): exome or genome
+    """
+    # the bucket-to-URL substitution is fixed per cohort, format it once
+    web_base = WEB_BASE.format(cohort)
+    web_url = WEB_URL_BASE.format(cohort)
+    for path in paths:
+        if report_date := DATE_REGEX.search(path):
+            yield Report(
+                dataset=cohort,
+                address=path.replace(web_base, web_url),
+                genome_or_exome=sequencing_type,
+                date=report_date.group(1),
+                title=path.rsplit('/', 1)[-1],
+            )
+
+
+def dedup_reports(reports: list[Report]) -> list[Report]:
     """
-    finds all existing reports, generates an HTML file
+    remove repeated reports, keyed on a (dataset, address) tuple rather than a formatted string
+    where the same report is seen twice, the last one wins
+    """
+    return list({(report.dataset, report.address): report for report in reports}.values())
+
+
+def collect_reports(parsed_reports: dict[str, dict[str, SequencingTypeReports]]) -> tuple[list[Report], list[Report]]:
     """
+    a single traversal of all fetched analyses, routing each report to the general or latest-only index
 
-    parsed_reports = {cohort: get_project_analyses(cohort) for cohort in get_my_projects()}
+    Args:
+        parsed_reports (dict): per-cohort binned analyses, from get_all_project_analyses
+
+    Returns:
+        the general reports, and the latest-only reports
+    """
 
     report_list: list[Report] = []
     latest_report_list: list[Report] = []
 
     for cohort, cohort_results in parsed_reports.items():
         for sequencing_type, output_section in cohort_results.items():
-            # general - only one of these
-            if (general_report_path := output_section.get('general')) and isinstance(general_report_path, str):
-                this_file_name = Path(general_report_path).name
-                trimmed_path = general_report_path.rstrip(this_file_name).rstrip('/')
-                dir_contents = list(map(str, to_anypath(trimmed_path).glob('*.html')))
-
-                for entry in filter(lambda x: 'latest' not in x, dir_contents):
-                    report_address = entry.replace(WEB_BASE.format(cohort), WEB_URL_BASE.format(cohort))
-                    report_name = entry.split('/')[-1]
-                    if report_date := DATE_REGEX.search(report_address):
-                        report_list.append(
-                            Report(
-                                dataset=cohort,
-                                address=report_address,
-                                genome_or_exome=sequencing_type,
-                                date=report_date.group(1),
-                                title=report_name,
-                            ),
-                        )
-            for latest_report in output_section.get('latest', []):
-                date = latest_report.rstrip('.html').split('_')[-1]
-                this_file_name = Path(latest_report).name
-
-                report_address = entry.replace(WEB_BASE.format(cohort), WEB_URL_BASE.format(cohort))
-                latest_report_list.append(
-                    Report(
-                        dataset=cohort,
-                        address=report_address,
-                        genome_or_exome=sequencing_type,
-                        date=date,
-                        title=this_file_name,
+            # general - only one of these, index every non-latest report in the same folder
+            if general_report_path := output_section['general']:
+                report_list.extend(
+                    reports_from_paths(
+                        paths=(
+                            entry
+                            for entry in map(str, to_anypath(general_report_path).parent.glob('*.html'))
+                            if 'latest' not in entry
+                        ),
+                        cohort=cohort,
+                        sequencing_type=sequencing_type,
                     ),
                 )
+            latest_report_list.extend(
+                reports_from_paths(
+                    paths=output_section['latest'],
+                    cohort=cohort,
+                    sequencing_type=sequencing_type,
+                ),
+            )
+
+    # a folder can be reached from more than one analysis entry, keep one Report per (dataset, address)
+    return dedup_reports(report_list), dedup_reports(latest_report_list)
+
+
+def main() -> None:
+    """
+    finds all existing reports, generates an HTML file for the general and latest-only reports
+    """
+
+    # one fetch pass serves both index pages
+    report_list, latest_report_list = collect_reports(get_all_project_analyses())
 
     html_from_reports(report_list, 'aip_index.html')
     html_from_reports(latest_report_list, 'latest_aip_index.html')
 
 
+def non_blank_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    re-split a stream of rendered template chunks into lines, dropping any which are only whitespace
+
+    Args:
+        chunks (Iterable[str]): template output, in arbitrarily sized pieces
+    """
+    remainder = ''
+    for chunk in chunks:
+        *lines, remainder = f'{remainder}{chunk}'.split('\n')
+        yield from (line for line in lines if line.strip())
+    if remainder.strip():
+        yield remainder
+
+
 def html_from_reports(reports: list[Report], title: str):
     """
     build some HTML
@@ -167,20 +249,18 @@ def html_from_reports(reports: list[Report], title: str):
         title (str): title of the page
     """
 
-    # smoosh into a list for the report context - all reports sortable by date
-    template_context = {'reports': reports}
-
-    # build some HTML
-    env = jinja2.Environment(loader=jinja2.FileSystemLoader(JINJA_TEMPLATE_DIR), autoescape=True)
-    template = env.get_template('report_index.html.jinja')
-    content = template.render(**template_context)
+    # smoosh into a list for the report context - newest first, so the template can iterate without sorting
+    template_context = {'reports': sorted(reports, key=attrgetter('date'), reverse=True)}
 
     # write to common web bucket - either attached to a single dataset, or communal
     write_index_to = to_anypath(INDEX_HOME.format(title))
-    get_logger().info(f'Writing {title} to {write_index_to}')
-    write_index_to.write_text('\n'.join(line for line in content.split('\n') if line.strip()))
+    script_logger.info('Writing %s to %s', title, write_index_to)
+
+    # stream the rendered HTML straight into the output, rather than holding the whole page in memory
+    with write_index_to.open('w') as handle:
+        handle.writelines(f'{line}\n' for line in non_blank_lines(get_index_template().generate(**template_context)))
 
 
 if __name__ == '__main__':
-    get_logger(__file__).info('Fetching all reports')
+    script_logger.info('Fetching all reports')
     main()
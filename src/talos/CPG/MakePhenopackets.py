@@ -82,7 +82,8 @@ def find_hpo_labels(metamist_data: dict, hpo_file: str | None = None) -> dict[st
         moi_nodes = nx.ancestors(hpo_graph, 'HP:0000005')
 
     for sg in metamist_data['project']['sequencingGroups']:
-        hpos = set(HPO_RE.findall(sg['sample']['participant']['phenotypes'].get(HPO_KEY, '')))
+        # collect matches straight into a set, no intermediate list of every match
+        hpos = {match.group() for match in HPO_RE.finditer(sg['sample']['participant']['phenotypes'].get(HPO_KEY, ''))}
 
         # groom out any strictly MOI related terms
         hpos -= moi_nodes
@@ -94,14 +95,14 @@ def find_hpo_labels(metamist_data: dict, hpo_file: str | None = None) -> dict[st
     if not (hpo_file and hpo_graph):
         return {sg: [{'id': hp, 'label': 'Unknown'} for hp in hpos] for sg, hpos in per_sg_hpos.items()}
 
-    # create a dictionary of HPO terms to their text
+    # create a dictionary of HPO terms to their text, one graph lookup per unique term across the whole cohort
     hpo_to_text: dict[str, str] = {}
     for hpo in all_hpos:
-        if not hpo_graph.has_node(hpo):
+        if (hpo_node := hpo_graph.nodes.get(hpo)) is None:
             get_logger(__file__).error(f'HPO term was absent from the tree: {hpo}')
             hpo_to_text[hpo] = 'Unknown'
         else:
-            hpo_to_text[hpo] = hpo_graph.nodes[hpo]['name']
+            hpo_to_text[hpo] = hpo_node['name']
 
     return {sg: [{'id': hp, 'label': hpo_to_text[hp]} for hp in hpos] for sg, hpos in per_sg_hpos.items()}
 
@@ -6,14 +6,18 @@ Designed to operate on an extended pedigree format (see docs)
 - write a new file containing participant-panel matches
 """
 
+import math
 import re
 from argparse import ArgumentParser
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
+import httpx
 import phenopackets.schema.v2 as pps2
 from google.protobuf.json_format import ParseDict
-from networkx import dfs_successors
+from networkx import MultiDiGraph
 from obonet import read_obo
+from pydantic_core import to_json
 
 from talos.config import config_retrieve
 from talos.models import ParticipantHPOPanels, PhenoPacketHpo, PhenotypeMatchedPanels
@@ -24,6 +28,7 @@ HPO_RE = re.compile(r'HP:\d+')
 
 PANELAPP_HARD_CODED_DEFAULT = 'https://panelapp.agha.umccr.org/api/v1/panels'
 PANELAPP_HARD_CODED_BASE_PANEL = 137
+PANELAPP_PAGE_WORKERS = 8
 
 try:
     PANELS_ENDPOINT = config_retrieve(['GeneratePanelData', 'panelapp'], PANELAPP_HARD_CODED_DEFAULT)
@@ -38,6 +43,9 @@ def get_panels(endpoint: str = PANELS_ENDPOINT) -> dict[str, set[int]]:
     """
     query panelapp, and collect panels by HPO term
 
+    the first page gives the total panel count, all remaining pages are then fetched concurrently
+    over a single pooled client, rather than following each 'next' link in turn
+
     Args:
         endpoint (str): URL for panels
 
@@ -47,18 +55,24 @@ def get_panels(endpoint: str = PANELS_ENDPOINT) -> dict[str, set[int]]:
 
     panels_by_hpo = defaultdict(set)
 
-    while True:
-        endpoint_data = get_json_response(endpoint)
+    with httpx.Client() as client:
+        first_page = get_json_response(endpoint, client=client)
+        pages = [first_page]
+
+        # derive every remaining page URL from the first 'next' link
+        if (next_page := first_page['next']) and first_page['results']:
+            page_count = math.ceil(first_page['count'] / len(first_page['results']))
+            page_urls = [str(httpx.URL(next_page).copy_set_param('page', page)) for page in range(2, page_count + 1)]
+            with ThreadPoolExecutor(max_workers=PANELAPP_PAGE_WORKERS) as executor:
+                pages.extend(executor.map(lambda url: get_json_response(url, client=client), page_urls))
+
+    for endpoint_data in pages:
         for panel in endpoint_data['results']:
             # can be split over multiple strings
             relevant_disorders = ' '.join(panel['relevant_disorders'] or [])
-            for match in re.findall(HPO_RE, relevant_disorders):
-                panels_by_hpo[match].add(int(panel['id']))
-
-        # cycle through additional pages
-        if endpoint := endpoint_data['next']:
-            continue
-        break
+            panel_id = int(panel['id'])
+            for match in HPO_RE.finditer(relevant_disorders):
+                panels_by_hpo[match.group()].add(panel_id)
 
     return dict(panels_by_hpo)
 
@@ -89,6 +103,48 @@ def set_up_cohort_pmp(cohort: pps2.Cohort) -> tuple[PhenotypeMatchedPanels, set[
     return hpo_dict, all_hpos
 
 
+def panels_for_term(
+    hpo_graph: MultiDiGraph,
+    hpo_panel_map: dict[str, set[int]],
+    hpo: str,
+    cache: dict[str, frozenset[int]],
+) -> frozenset[int]:
+    """
+    find all panels attached to this HPO term, or any of its ancestors back to the ontology root
+
+    walks the graph iteratively, resolving each term only after all its parents, and storing every resolved term in
+    the cache - query terms sharing ancestors (most of them, near the root) reuse those results instead of re-walking
+
+    Args:
+        hpo_graph (MultiDiGraph): the HPO tree, edges pointing from each term to its parent(s)
+        hpo_panel_map (dict): HPO terms to all related panel IDs
+        hpo (str): the HPO term to resolve
+        cache (dict): per-run lookup of HPO term: all panels from that term and its ancestors
+
+    Returns:
+        the panel IDs associated with this term or any ancestor
+    """
+    in_progress: set[str] = set()
+    stack = [hpo]
+    while stack:
+        term = stack[-1]
+        if term in cache:
+            stack.pop()
+            continue
+        in_progress.add(term)
+        parents = list(hpo_graph.successors(term))
+        if pending := [parent for parent in parents if parent not in cache and parent not in in_progress]:
+            stack.extend(pending)
+            continue
+        panels = set(hpo_panel_map.get(term, ()))
+        for parent in parents:
+            panels.update(cache.get(parent, ()))
+        cache[term] = frozenset(panels)
+        in_progress.discard(term)
+        stack.pop()
+    return cache[hpo]
+
+
 def match_hpos_to_panels(hpo_panel_map: dict[str, set[int]], hpo_file: str, all_hpos: set[str]) -> dict[str, set[int]]:
     """
     take the HPO terms from the participant metadata, and match to panels
@@ -104,14 +160,15 @@ def match_hpos_to_panels(hpo_panel_map: dict[str, set[int]], hpo_file: str, all_
 
     hpo_graph = read_obo(hpo_file, ignore_obsolete=False)
 
-    hpo_to_panels = defaultdict(set)
+    # identify all HPO terms back to the ontology root, sharing the resolved ancestors between query terms
+    # every term is resolved at most once per run, however many query terms it is an ancestor of
+    cache: dict[str, frozenset[int]] = {}
+    hpo_to_panels: defaultdict[str, set[int]] = defaultdict(set)
     for hpo in all_hpos:
-        # identify all HPO terms back to the ontology root
-        successor_hpo_terms = set(dfs_successors(hpo_graph, hpo))
-
-        for hpo_term in successor_hpo_terms:
-            if hpo_term in hpo_panel_map:
-                hpo_to_panels[hpo].update(hpo_panel_map[hpo_term])
+        # obsolete terms are detached from the tree, so also resolve the term(s) they were replaced by
+        for term in [hpo, *hpo_graph.nodes.get(hpo, {}).get('replaced_by', [])]:
+            if panels := panels_for_term(hpo_graph, hpo_panel_map, term, cache):
+                hpo_to_panels[hpo].update(panels)
 
     return hpo_to_panels
 
@@ -130,12 +187,11 @@ def match_participants_to_panels(participant_hpos: PhenotypeMatchedPanels, hpo_p
     """
 
     for party_data in participant_hpos.samples.values():
-        for hpo_term in party_data.hpo_terms:
-            if panel_list := hpo_panels.get(hpo_term.id):
-                # add relevant panels for this participant
-                party_data.panels.update(panel_list)
-                # and add to the collection of all panels
-                participant_hpos.all_panels.update(panel_list)
+        # gather the panels for all this participant's terms, then add them to the participant's set in one go
+        matched_panels: set[int] = set().union(*(hpo_panels.get(hpo_term.id, ()) for hpo_term in party_data.hpo_terms))
+        party_data.panels.update(matched_panels)
+        # and add to the collection of all panels
+        participant_hpos.all_panels.update(matched_panels)
 
 
 def cli_main():
@@ -177,13 +233,11 @@ def main(ga4gh_cohort_file: str, panel_out: str, hpo_file: str):
 
     match_participants_to_panels(pmp_dict, hpo_to_panels)
 
-    # validate the object
-    valid_pheno_dict = PhenotypeMatchedPanels.model_validate(pmp_dict)
-
-    # validate and write using pydantic
+    # every part of this object was built as a typed model, so it's written directly with no re-validation pass
+    # serialised straight to UTF-8 bytes, no intermediate str to re-encode
     if panel_out:
-        with open(panel_out, 'w', encoding='utf-8') as handle:
-            handle.write(valid_pheno_dict.model_dump_json(indent=4))
+        with open(panel_out, 'wb') as handle:
+            handle.write(to_json(pmp_dict, indent=4))
 
 
 if __name__ == '__main__':
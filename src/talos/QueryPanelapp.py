@@ -6,10 +6,13 @@ Write the data out as a PanelApp object model
 """
 
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+
+import httpx
 from dateutil.parser import parse
 from dateutil.utils import today
-
+from pydantic_core import to_json
 
 from talos.config import config_retrieve
 from talos.models import PanelApp, PanelDetail, PanelShort, PhenotypeMatchedPanels
@@ -20,6 +23,8 @@ from talos.utils import ORDERED_MOIS, get_json_response, get_logger, get_simple_
 PANELAPP_HARD_CODED_DEFAULT = 'https://panelapp.agha.umccr.org/api/v1/panels'
 # numerical ID of the Mendeliome in PanelApp Australia
 PANELAPP_HARD_CODED_BASE_PANEL = 137
+# concurrent panel requests when collecting all the panels for this analysis
+PANELAPP_QUERY_WORKERS = 16
 
 try:
     PANELAPP_BASE = config_retrieve(['GeneratePanelData', 'panelapp'], PANELAPP_HARD_CODED_DEFAULT)
@@ -36,17 +41,18 @@ REALLY_OLD = parse('1970-01-01')
 ACTIVITY_CONTENT = {'green list (high evidence)', 'expert review green'}
 
 
-def request_panel_data(url: str) -> tuple[str, str, list]:
+def request_panel_data(url: str, client: httpx.Client | None = None) -> tuple[str, str, list]:
     """
     takes care of the panelapp query
     Args:
         url ():
+        client (httpx.Client): optional, a shared client to reuse pooled connections
 
     Returns:
         components of the panelapp response
     """
 
-    panel_json = get_json_response(url)
+    panel_json = get_json_response(url, client=client)
     panel_name = panel_json.get('name')
     panel_version = panel_json.get('version')
     panel_genes = panel_json.get('genes')
@@ -93,11 +99,32 @@ def parse_panel_activity(panel_activity: list[dict]) -> dict[str, datetime]:
     return return_dict
 
 
+def fetch_panel(panel_id: int, client: httpx.Client | None = None) -> tuple[str, str, list, dict[str, datetime]]:
+    """
+    query PanelApp for a single panel, and the activity log for that panel
+    this is only the network-bound part of collecting a panel, so it is safe to run concurrently
+
+    Args:
+        panel_id (int): specific panel ID
+        client (httpx.Client): optional, a shared client to reuse pooled connections
+
+    Returns:
+        the panel name, version, genes, and the date each gene was first rated green
+    """
+    panel_name, panel_version, panel_genes = request_panel_data(f'{PANELAPP_BASE}/{panel_id}/', client=client)
+
+    # get the activity log for this panel
+    panel_activity = get_json_response(f'{PANELAPP_BASE}/{panel_id}/activities/', client=client)
+
+    return panel_name, panel_version, panel_genes, parse_panel_activity(panel_activity)
+
+
 def get_panel(
     gene_dict: PanelApp,
     panel_id: int = DEFAULT_PANEL,
     blacklist: list[str] | None = None,
     forbidden_genes: set[str] | None = None,
+    panel_data: tuple[str, str, list, dict[str, datetime]] | None = None,
 ):
     """
     Takes a panel number, and pulls all GRCh38 gene details from PanelApp
@@ -108,6 +135,7 @@ def get_panel(
         panel_id (): specific panel or 'base' (e.g. 137)
         blacklist (): list of symbols/ENSG IDs to remove from this panel
         forbidden_genes (set[str]): genes to remove for this cohort
+        panel_data (tuple): optional, the result of fetch_panel for this panel, if already queried
     """
 
     if blacklist is None:
@@ -116,12 +144,10 @@ def get_panel(
     if forbidden_genes is None:
         forbidden_genes = set()
 
-    panel_name, panel_version, panel_genes = request_panel_data(f'{PANELAPP_BASE}/{panel_id}/')
+    if panel_data is None:
+        panel_data = fetch_panel(panel_id)
 
-    # get the activity log for this panel
-    panel_activity = get_json_response(f'{PANELAPP_BASE}/{panel_id}/activities/')
-
-    green_dates = parse_panel_activity(panel_activity)
+    panel_name, panel_version, panel_genes, green_dates = panel_data
 
     # find the threshold for when a gene should be treated as recent - new if added within this many months
     # by default we're falling back to 6 months, just so we don't fail is this is absent in config
@@ -154,12 +180,15 @@ def get_panel(
 
         # for some reason the build is capitalised oddly in panelapp
         # at least one entry doesn't have an ENSG annotation
-        for build, content in gene['gene_data']['ensembl_genes'].items():
-            if build.lower() == 'grch38':
-                # the ensembl version may alter over time, but will be singular
-                ensembl_data = content[next(iter(content.keys()))]
-                ensg = ensembl_data['ensembl_id']
-                chrom = ensembl_data['location'].split(':')[0]
+        grch38 = next(
+            (content for build, content in gene['gene_data']['ensembl_genes'].items() if build.lower() == 'grch38'),
+            None,
+        )
+        if grch38:
+            # the ensembl version may alter over time, but will be singular
+            ensembl_data = next(iter(grch38.values()))
+            ensg = ensembl_data['ensembl_id']
+            chrom = ensembl_data['location'].partition(':')[0]
 
         if chrom is None:
             get_logger().info(f'Gene {symbol}/{ensg} removed from {panel_name} for lack of chrom annotation')
@@ -216,8 +245,8 @@ def get_best_moi(gene_dict: dict):
             content.moi = 'Mono_And_Biallelic'
 
         else:
-            # take the more lenient of the gene MOI options
-            content.moi = sorted(simplified_mois, key=lambda x: ORDERED_MOIS.index(x))[0]
+            # take the most lenient of the gene MOI options
+            content.moi = min(simplified_mois, key=ORDERED_MOIS.index)
 
 
 def cli_main():
@@ -250,10 +279,6 @@ def main(panels: str | None, out_path: str):
     # set up the gene dict
     gene_dict = PanelApp(genes={})
 
-    # first add the base content
-    get_logger().info('Getting Base Panel')
-    get_panel(gene_dict, blacklist=remove_from_core, forbidden_genes=forbidden_genes)
-
     # if participant panels were provided, add each of those to the gene data
     panel_list: set[int] = set()
     if panels is not None:
@@ -267,20 +292,30 @@ def main(panels: str | None, out_path: str):
         get_logger().info(f'Cohort-specific panels: {", ".join(map(str, extra_panels))}')
         panel_list.update(extra_panels)
 
-    for panel in panel_list:
-        # skip mendeliome - we already queried for it
-        if panel == DEFAULT_PANEL:
-            continue
+    # the base panel first, then each additional panel - skip mendeliome in the additional panels
+    panel_ids = [DEFAULT_PANEL, *(panel for panel in panel_list if panel != DEFAULT_PANEL)]
+
+    # the queries are network-bound and independent, so send them all concurrently over one pooled client
+    get_logger().info(f'Getting Panels: {", ".join(map(str, panel_ids))}')
+    with httpx.Client() as client, ThreadPoolExecutor(max_workers=PANELAPP_QUERY_WORKERS) as executor:
+        all_panel_data = list(executor.map(lambda panel: fetch_panel(panel, client=client), panel_ids))
 
-        get_logger().info(f'Getting Panel {panel}')
-        get_panel(gene_dict=gene_dict, panel_id=panel, forbidden_genes=forbidden_genes)
+    # then integrate each panel in turn, in the same order as the queries
+    for panel, panel_data in zip(panel_ids, all_panel_data):
+        get_panel(
+            gene_dict=gene_dict,
+            panel_id=panel,
+            blacklist=remove_from_core if panel == DEFAULT_PANEL else None,
+            forbidden_genes=forbidden_genes,
+            panel_data=panel_data,
+        )
 
     # now get the best MOI, and update the entities in place
     get_best_moi(gene_dict.genes)
 
     # write the output to long term storage
-    with open(out_path, 'w') as out_file:
-        out_file.write(PanelApp.model_validate(gene_dict).model_dump_json(indent=4))
+    with open(out_path, 'wb') as out_file:
+        out_file.write(to_json(PanelApp.model_validate(gene_dict), indent=4))
 
 
 if __name__ == '__main__':
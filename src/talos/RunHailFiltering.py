@@ -11,7 +11,9 @@ Read, filter, annotate, classify, and write Genetic data
 - write as VCF
 """
 
+import logging
 from argparse import ArgumentParser
+from functools import lru_cache
 
 import hail as hl
 from peds import open_ped
@@ -19,6 +21,7 @@ from peds import open_ped
 from talos.config import config_retrieve
 from talos.hail_audit import (
     BASE_FIELDS_REQUIRED,
+    ENTRY_FIELDS_USED,
     FIELDS_REQUIRED,
     USELESS_FIELDS,
     VEP_TX_FIELDS_REQUIRED,
@@ -41,6 +44,29 @@ SPLICE_ALTERING = hl.str('splice-altering')
 
 # decide whether to repartition the data before processing starts
 MAX_PARTITIONS = 10000
+# an input with fewer partitions than this many per core is split on read, so every core has work
+MIN_PARTITIONS_PER_CORE = 4
+
+
+@lru_cache(1)
+def critical_consequences_expr() -> hl.SetExpression:
+    """
+    the configured critical consequences as a Hail set, built once and shared by every query using it
+    """
+    return hl.literal(set(config_retrieve(['RunHailFiltering', 'critical_csq'])), dtype=hl.tset(hl.tstr))
+
+
+@lru_cache(1)
+def consequence_filter_expr() -> hl.SetExpression:
+    """
+    the critical and additional consequences as a Hail set, built once (used in the de novo consequence filter)
+    at time of writing this is VEP HIGH + missense_variant
+    """
+    return hl.literal(
+        set(config_retrieve(['RunHailFiltering', 'critical_csq'], []))
+        | set(config_retrieve(['RunHailFiltering', 'additional_csq'], [])),
+        dtype=hl.tset(hl.tstr),
+    )
 
 
 def annotate_clinvarbitration(mt: hl.MatrixTable, clinvar: str) -> hl.MatrixTable:
@@ -78,17 +104,13 @@ def annotate_clinvarbitration(mt: hl.MatrixTable, clinvar: str) -> hl.MatrixTabl
     )
 
     # annotate as either strong or regular, return the result
+    # the lower-cased pathogenic check is bound once, and shared by both flags
     return mt.annotate_rows(
-        info=mt.info.annotate(
-            clinvar_talos=hl.if_else(
-                mt.info.clinvar_significance.lower().contains(PATHOGENIC),
-                ONE_INT,
-                MISSING_INT,
-            ),
-            clinvar_talos_strong=hl.if_else(
-                (mt.info.clinvar_significance.lower().contains(PATHOGENIC)) & (mt.info.clinvar_stars > 0),
-                ONE_INT,
-                MISSING_INT,
+        info=hl.rbind(
+            mt.info.clinvar_significance.lower().contains(PATHOGENIC),
+            lambda is_pathogenic: mt.info.annotate(
+                clinvar_talos=hl.if_else(is_pathogenic, ONE_INT, MISSING_INT),
+                clinvar_talos_strong=hl.if_else(is_pathogenic & (mt.info.clinvar_stars > 0), ONE_INT, MISSING_INT),
             ),
         ),
     )
@@ -275,6 +297,32 @@ def annotate_splicevardb(mt: hl.MatrixTable, svdb_path: str | None):
     )
 
 
+def filter_override_expr(mt: hl.MatrixTable) -> hl.BooleanExpression:
+    """
+    variants which are retained regardless of the quality and frequency filters
+    ClinVar Pathogenic, SpliceVarDB splice-altering, or selected by Exomiser
+
+    Args:
+        mt (hl.MatrixTable): all remaining variants
+    """
+    return (
+        (mt.info.clinvar_talos == ONE_INT)
+        | (mt.info.categorybooleansvdb == ONE_INT)
+        | (mt.info.categorydetailsexomiser != MISSING_STRING)
+    )
+
+
+def quality_flags_expr(mt: hl.MatrixTable) -> hl.BooleanExpression:
+    """
+    true for rows with 0 quality filters
+    note: in Hail, PASS is represented as an empty set
+
+    Args:
+        mt (hl.MatrixTable): all remaining variants
+    """
+    return hl.is_missing(mt.filters) | (mt.filters.length() == 0)
+
+
 def filter_on_quality_flags(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
     filter MT to rows with 0 quality filters
@@ -288,15 +336,7 @@ def filter_on_quality_flags(mt: hl.MatrixTable) -> hl.MatrixTable:
         MT with all filtered variants removed
     """
 
-    return mt.filter_rows(
-        hl.is_missing(mt.filters)
-        | (mt.filters.length() == 0)
-        | (
-            (mt.info.clinvar_talos == ONE_INT)
-            | (mt.info.categorybooleansvdb == ONE_INT)
-            | (mt.info.categorydetailsexomiser != MISSING_STRING)
-        ),
-    )
+    return mt.filter_rows(quality_flags_expr(mt) | filter_override_expr(mt))
 
 
 def filter_to_well_normalised(mt: hl.MatrixTable) -> hl.MatrixTable:
@@ -345,6 +385,18 @@ def extract_annotations(mt: hl.MatrixTable) -> hl.MatrixTable:
     )
 
 
+def callset_ac_expr(mt: hl.MatrixTable, ac_threshold: float = 0.01) -> hl.BooleanExpression:
+    """
+    true for variants under the AC threshold in the joint-call, or with 5 or fewer instances
+
+    Args:
+        mt (hl.MatrixTable):
+        ac_threshold (float):
+    """
+    min_callset_ac = 5
+    return (min_callset_ac >= mt.info.AC[0]) | (ac_threshold > mt.info.AC[0] / mt.info.AN)
+
+
 def filter_matrix_by_ac(mt: hl.MatrixTable, ac_threshold: float = 0.01) -> hl.MatrixTable:
     """
     Remove variants with AC in joint-call over threshold
@@ -358,36 +410,45 @@ def filter_matrix_by_ac(mt: hl.MatrixTable, ac_threshold: float = 0.01) -> hl.Ma
         MT with all common-in-this-JC variants removed
         (unless overridden by clinvar path)
     """
-    min_callset_ac = 5
-    return mt.filter_rows(
-        ((min_callset_ac >= mt.info.AC[0]) | (ac_threshold > mt.info.AC[0] / mt.info.AN))
-        | (
-            (mt.info.clinvar_talos == ONE_INT)
-            | (mt.info.categorybooleansvdb == ONE_INT)
-            | (mt.info.categorydetailsexomiser != MISSING_STRING)
-        ),
-    )
+    return mt.filter_rows(callset_ac_expr(mt, ac_threshold) | filter_override_expr(mt))
 
 
-def filter_to_population_rare(mt: hl.MatrixTable) -> hl.MatrixTable:
+def population_rare_expr(mt: hl.MatrixTable) -> hl.BooleanExpression:
     """
-    run the rare filter, using Gnomad Exomes and Genomes
-    allow clinvar pathogenic to slip through this filter
+    true for variants rare in both gnomAD Exomes and Genomes
     """
     # gnomad exomes and genomes below threshold or missing
     # if missing they were previously replaced with 0.0
     # 'semi-rare' as dominant filters will be more strictly filtered later
     rare_af_threshold = config_retrieve(['RunHailFiltering', 'af_semi_rare'])
+    return (hl.or_else(mt.gnomad_exomes.AF, MISSING_FLOAT_LO) < rare_af_threshold) & (
+        hl.or_else(mt.gnomad_genomes.AF, MISSING_FLOAT_LO) < rare_af_threshold
+    )
+
+
+def filter_to_population_rare(mt: hl.MatrixTable) -> hl.MatrixTable:
+    """
+    run the rare filter, using Gnomad Exomes and Genomes
+    allow clinvar pathogenic to slip through this filter
+    """
+    return mt.filter_rows(population_rare_expr(mt) | filter_override_expr(mt))
+
+
+def filter_rare_and_high_quality(mt: hl.MatrixTable, ac_threshold: float = 0.01) -> hl.MatrixTable:
+    """
+    the population-rare, quality flag, and callset AC filters as a single row filter
+    equivalent to running filter_to_population_rare, filter_on_quality_flags, and filter_matrix_by_ac in turn,
+    as each of those is individually overridden by the same ClinVar/SVDB/Exomiser conditions
+
+    Args:
+        mt (hl.MatrixTable):
+        ac_threshold (float):
+    Returns:
+        MT with all common or quality-failing variants removed, unless overridden
+    """
     return mt.filter_rows(
-        (
-            (hl.or_else(mt.gnomad_exomes.AF, MISSING_FLOAT_LO) < rare_af_threshold)
-            & (hl.or_else(mt.gnomad_genomes.AF, MISSING_FLOAT_LO) < rare_af_threshold)
-        )
-        | (
-            (mt.info.clinvar_talos == ONE_INT)
-            | (mt.info.categorybooleansvdb == ONE_INT)
-            | (mt.info.categorydetailsexomiser != MISSING_STRING)
-        ),
+        (population_rare_expr(mt) & quality_flags_expr(mt) & callset_ac_expr(mt, ac_threshold))
+        | filter_override_expr(mt),
     )
 
 
@@ -398,7 +459,8 @@ def drop_useless_fields(mt: hl.MatrixTable) -> hl.MatrixTable:
     Aim to reduce that by removing the amount of written data
 
     These fields would not be exported in the VCF anyway, so no downstream
-    impacts caused by removal prior to that write
+    impacts caused by removal prior to that write. Entry fields are the bulk
+    of each row, so only those used later on are retained
 
     Args:
         mt ():
@@ -409,6 +471,9 @@ def drop_useless_fields(mt: hl.MatrixTable) -> hl.MatrixTable:
     # drop the useless top-level fields
     mt = mt.drop(*[field for field in USELESS_FIELDS if field in mt.row_value])
 
+    # and every entry field which is neither used in de novo calling nor exported
+    mt = mt.select_entries(*[field for field in ENTRY_FIELDS_USED if field in mt.entry])
+
     # now drop most VEP fields
     return mt.annotate_rows(vep=hl.Struct(transcript_consequences=mt.vep.transcript_consequences))
 
@@ -448,6 +513,17 @@ def split_rows_by_gene_and_filter_to_green(mt: hl.MatrixTable, green_genes: hl.S
         exploded MatrixTable
     """
 
+    # group the relevant transcript consequences by gene once, before the explode
+    # otherwise a variant in K genes would have its full transcript list re-scanned on each of the K rows
+    mt = mt.annotate_rows(
+        tx_by_gene=hl.group_by(
+            lambda x: x.gene_id,
+            mt.vep.transcript_consequences.filter(
+                lambda x: (x.biotype == 'protein_coding') | (x.mane_select.contains('NM') | (x.biotype == 'snRNA')),
+            ),
+        ),
+    )
+
     # split each gene onto a separate row, transforms 'geneIds' field from set to string
     mt = mt.explode_rows(mt.geneIds)
 
@@ -456,38 +532,47 @@ def split_rows_by_gene_and_filter_to_green(mt: hl.MatrixTable, green_genes: hl.S
 
     # limit the per-row transcript CSQ to those relevant to the single
     # gene now present on each row
-    return mt.annotate_rows(
+    mt = mt.annotate_rows(
         vep=mt.vep.annotate(
-            transcript_consequences=mt.vep.transcript_consequences.filter(
-                lambda x: (mt.geneIds == x.gene_id)
-                & ((x.biotype == 'protein_coding') | (x.mane_select.contains('NM') | (x.biotype == 'snRNA'))),
+            transcript_consequences=mt.tx_by_gene.get(
+                mt.geneIds,
+                hl.empty_array(mt.vep.transcript_consequences.dtype.element_type),
             ),
         ),
     )
+    return mt.drop('tx_by_gene')
 
 
-def annotate_category_1(mt: hl.MatrixTable) -> hl.MatrixTable:
+def category_1_expr(mt: hl.MatrixTable) -> hl.Int32Expression:
     """
-    Applies the boolean Category1 annotation
+    the boolean Category1 expression
      - clinvar_talos_strong flag, as set in annotate_aip_clinvar
      - represents non-conflicting clinvar pathogenic/likely path
 
+    Args:
+        mt ():
+    Returns:
+        an expression evaluating to 1 or 0 per row
+    """
+    return hl.int32(mt.info.clinvar_talos_strong == ONE_INT)
+
+
+def annotate_category_1(mt: hl.MatrixTable) -> hl.MatrixTable:
+    """
+    Applies the boolean Category1 annotation, see category_1_expr
+
     Args:
         mt ():
     Returns:
         same variants, with categoryboolean1 set to 1 or 0
     """
 
-    return mt.annotate_rows(
-        info=mt.info.annotate(
-            categoryboolean1=hl.if_else(mt.info.clinvar_talos_strong == ONE_INT, ONE_INT, MISSING_INT),
-        ),
-    )
+    return mt.annotate_rows(info=mt.info.annotate(categoryboolean1=category_1_expr(mt)))
 
 
-def annotate_category_6(mt: hl.MatrixTable) -> hl.MatrixTable:
+def category_6_expr(mt: hl.MatrixTable) -> hl.Int32Expression:
     """
-    applies the boolean Category6 flag
+    the boolean Category6 expression
     - AlphaMissense likely Pathogenic on at least one transcript
     - Thresholds of am_pathogenicity:
         'Likely benign' if am_pathogenicity < 0.34;
@@ -501,29 +586,40 @@ def annotate_category_6(mt: hl.MatrixTable) -> hl.MatrixTable:
     Args:
         mt (hl.MatrixTable):
     Returns:
-        same variants, categoryboolean6 set to 1 or 0
+        an expression evaluating to 1 or 0 per row
     """
 
     # focus on the auto-annotated AlphaMissense class
     # allow for the field to be missing
     if 'am_class' not in list(mt.vep.transcript_consequences[0].keys()):
         get_logger().warning('AlphaMissense class not found, skipping annotation')
-        return mt.annotate_rows(info=mt.info.annotate(categoryboolean6=MISSING_INT))
+        return MISSING_INT
 
-    return mt.annotate_rows(
-        info=mt.info.annotate(
-            categoryboolean6=hl.if_else(
-                hl.len(mt.vep.transcript_consequences.filter(lambda x: x.am_class == 'likely_pathogenic')) > 0,
-                ONE_INT,
-                MISSING_INT,
-            ),
+    # any() stops at the first hit without building a filtered array, and a transcript with no
+    # AlphaMissense class (the common case) fails the null check without reaching the string comparison
+    return hl.int32(
+        mt.vep.transcript_consequences.any(
+            lambda x: hl.is_defined(x.am_class) & (x.am_class == 'likely_pathogenic'),
         ),
     )
 
 
-def annotate_category_3(mt: hl.MatrixTable) -> hl.MatrixTable:
+def annotate_category_6(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
-    applies the boolean Category3 flag
+    applies the boolean Category6 flag, see category_6_expr
+
+    Args:
+        mt (hl.MatrixTable):
+    Returns:
+        same variants, categoryboolean6 set to 1 or 0
+    """
+
+    return mt.annotate_rows(info=mt.info.annotate(categoryboolean6=category_6_expr(mt)))
+
+
+def category_3_expr(mt: hl.MatrixTable) -> hl.Int32Expression:
+    """
+    the boolean Category3 expression
     - Critical protein consequence on at least one transcript
     - either predicted NMD or
     - any star Pathogenic or Likely_pathogenic in Clinvar
@@ -531,44 +627,42 @@ def annotate_category_3(mt: hl.MatrixTable) -> hl.MatrixTable:
     Args:
         mt (hl.MatrixTable):
     Returns:
-        same variants, categoryboolean3 set to 1 or 0
+        an expression evaluating to 1 or 0 per row
     """
 
-    critical_consequences = hl.set(config_retrieve(['RunHailFiltering', 'critical_csq']))
+    critical_consequences = critical_consequences_expr()
+
+    # a short-circuiting membership probe per term, rather than building a set per transcript to intersect
+    def is_critical(tx: hl.StructExpression) -> hl.BooleanExpression:
+        return tx.consequence_terms.any(lambda term: critical_consequences.contains(term))
 
     # First check if we have any HIGH consequences
     # then explicitly link the LOFTEE check with HIGH consequences
     # OR allow for a pathogenic ClinVar, any Stars
-    return mt.annotate_rows(
-        info=mt.info.annotate(
-            categoryboolean3=hl.if_else(
-                (
-                    hl.len(
-                        mt.vep.transcript_consequences.filter(
-                            lambda x: (hl.len(critical_consequences.intersection(hl.set(x.consequence_terms))) > 0),
-                        ),
-                    )
-                    > 0
-                )
-                & (
-                    (
-                        hl.len(
-                            mt.vep.transcript_consequences.filter(
-                                lambda x: (hl.len(critical_consequences.intersection(hl.set(x.consequence_terms))) > 0)
-                                & ((x.lof == LOFTEE_HC) | (hl.is_missing(x.lof))),
-                            ),
-                        )
-                        > 0
-                    )
-                    | (mt.info.clinvar_talos == ONE_INT)
-                ),
-                ONE_INT,
-                MISSING_INT,
-            ),
+    return hl.int32(
+        mt.vep.transcript_consequences.any(is_critical)
+        & (
+            mt.vep.transcript_consequences.any(
+                lambda x: is_critical(x) & ((x.lof == LOFTEE_HC) | (hl.is_missing(x.lof))),
+            )
+            | (mt.info.clinvar_talos == ONE_INT)
         ),
     )
 
 
+def annotate_category_3(mt: hl.MatrixTable) -> hl.MatrixTable:
+    """
+    applies the boolean Category3 flag, see category_3_expr
+
+    Args:
+        mt (hl.MatrixTable):
+    Returns:
+        same variants, categoryboolean3 set to 1 or 0
+    """
+
+    return mt.annotate_rows(info=mt.info.annotate(categoryboolean3=category_3_expr(mt)))
+
+
 def filter_by_consequence(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
     - reduce the per-row transcript CSQ to a limited group
@@ -580,16 +674,13 @@ def filter_by_consequence(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
 
     # at time of writing this is VEP HIGH + missense_variant
-    # update without updating the dictionary content
-    critical_consequences = set(config_retrieve(['RunHailFiltering', 'critical_csq'], [])) | set(
-        config_retrieve(['RunHailFiltering', 'additional_csq'], []),
-    )
+    critical_consequences = consequence_filter_expr()
 
-    # overwrite the consequences with an intersection against a limited list
+    # overwrite the consequences, retaining those with at least one term in a limited list
     filtered_mt = mt.annotate_rows(
         vep=mt.vep.annotate(
             transcript_consequences=mt.vep.transcript_consequences.filter(
-                lambda x: (hl.len(hl.set(x.consequence_terms).intersection(critical_consequences)) > 0)
+                lambda x: x.consequence_terms.any(lambda term: critical_consequences.contains(term))
                 | (x.biotype == 'snRNA'),
             ),
         ),
@@ -602,7 +693,7 @@ def filter_by_consequence(mt: hl.MatrixTable) -> hl.MatrixTable:
     )
 
 
-def annotate_category_4(mt: hl.MatrixTable, ped_file_path: str) -> hl.MatrixTable:
+def annotate_category_4(mt: hl.MatrixTable, ped_file_path: str, checkpoint: str | None = None) -> hl.MatrixTable:
     """
     Category based on de novo MOI, restricted to a group of consequences
     default uses the Hail builtin method (very strict)
@@ -611,6 +702,7 @@ def annotate_category_4(mt: hl.MatrixTable, ped_file_path: str) -> hl.MatrixTabl
     Args:
         mt ():
         ped_file_path (): path to a pedigree in PLINK format
+        checkpoint (str): optional, if provided the per-variant de novo results are written here before use
 
     Returns:
         same variants, categorysample4 either 'missing' or sample IDs
@@ -640,19 +732,25 @@ def annotate_category_4(mt: hl.MatrixTable, ped_file_path: str) -> hl.MatrixTabl
         max_parent_ab=config_retrieve(['RunHailFiltering', 'max_parent_ab'], 0.05),
     )
 
-    # re-key the table by locus,alleles, removing the sampleID from the compound key
-    dn_table = dn_table.key_by(dn_table.locus, dn_table.alleles)
-
-    # we only require the key (locus, alleles) and the sample ID
-    # select to remove other fields, then collect per-key into Array of Structs
-    dn_table = dn_table.select(dn_table.id).collect_by_key()
+    # group by locus,alleles, removing the sampleID from the compound key
+    # collect the sample IDs per variant inside the aggregator, and delimit into a single String
+    # this avoids building an intermediate Array of Structs per variant
+    # collect gives no ordering guarantee, so sort the IDs to keep the joined string stable between runs
+    dn_table = dn_table.group_by(dn_table.locus, dn_table.alleles).aggregate(
+        dn_ids=hl.delimit(hl.sorted(hl.agg.collect(dn_table.id)), ','),
+    )
 
-    # collect all sample IDs per locus, and squash into a String Array
-    # delimit to compress that Array into single Strings
-    dn_table = dn_table.annotate(dn_ids=hl.delimit(hl.map(lambda x: x.id, dn_table.values), ','))
+    # the de novo search is the most expensive part of this pipeline, and its result is small
+    # persist it so the count and the join back into the full MT don't each re-run the search
+    if checkpoint:
+        dn_table = dn_table.checkpoint(checkpoint)
 
-    # log the number of variants found this way
-    get_logger().info(f'{dn_table.count()} variants showed de novo inheritance')
+    # log the number of variants found this way - free from the checkpoint metadata, otherwise this would be an
+    # extra de novo search just for a log line, so only do that if debug logging was requested
+    if checkpoint:
+        get_logger().info(f'{dn_table.count()} variants showed de novo inheritance')
+    elif get_logger().isEnabledFor(logging.DEBUG):
+        get_logger().debug(f'{dn_table.count()} variants showed de novo inheritance')
 
     # annotate those values as a flag if relevant, else 'missing'
     return mt.annotate_rows(
@@ -660,9 +758,22 @@ def annotate_category_4(mt: hl.MatrixTable, ped_file_path: str) -> hl.MatrixTabl
     )
 
 
+def category_5_expr(mt: hl.MatrixTable) -> hl.Int32Expression:
+    """
+    the SpliceAI based Category5 expression
+    Args:
+        mt ():
+
+    Returns:
+        an expression evaluating to 1 or 0 per row
+    """
+
+    return hl.int32(mt.info.splice_ai_delta >= config_retrieve(['RunHailFiltering', 'spliceai']))
+
+
 def annotate_category_5(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
-    SpliceAI based category assignment
+    SpliceAI based category assignment, see category_5_expr
     Args:
         mt ():
 
@@ -670,13 +781,28 @@ def annotate_category_5(mt: hl.MatrixTable) -> hl.MatrixTable:
         same variants, categoryboolean5 set to 0 or 1
     """
 
+    return mt.annotate_rows(info=mt.info.annotate(categoryboolean5=category_5_expr(mt)))
+
+
+def annotate_row_categories(mt: hl.MatrixTable) -> hl.MatrixTable:
+    """
+    applies all the row-level boolean categories (1, 3, 5, 6) in a single annotation
+    this is equivalent to calling each annotate_category_X method in turn, but rebuilds the info struct once
+    instead of once per category, keeping the query plan shallow
+
+    Args:
+        mt ():
+
+    Returns:
+        same variants, with categoryboolean1, 3, 5, and 6 each set to 0 or 1
+    """
+
     return mt.annotate_rows(
         info=mt.info.annotate(
-            categoryboolean5=hl.if_else(
-                mt.info.splice_ai_delta >= config_retrieve(['RunHailFiltering', 'spliceai']),
-                ONE_INT,
-                MISSING_INT,
-            ),
+            categoryboolean1=category_1_expr(mt),
+            categoryboolean6=category_6_expr(mt),
+            categoryboolean3=category_3_expr(mt),
+            categoryboolean5=category_5_expr(mt),
         ),
     )
 
@@ -697,6 +823,13 @@ def vep_struct_to_csq(vep_expr: hl.expr.StructExpression) -> hl.expr.ArrayExpres
         generates an array of Strings for each CSQ
     """
 
+    # pull the required fields and ordering from config
+    csq_fields = config_retrieve(['RunHailFiltering', 'csq_string'])
+
+    def as_csq_string(expr: hl.expr.Expression) -> hl.expr.StringExpression:
+        # only cast fields which aren't already strings, every field still needs a missing -> '' default
+        return hl.or_else(expr if expr.dtype == hl.tstr else hl.str(expr), '')
+
     def get_csq_from_struct(element: hl.expr.StructExpression) -> hl.expr.StringExpression:
         # Most fields are 1-1, just lowercase
         fields = dict(element)
@@ -713,10 +846,8 @@ def vep_struct_to_csq(vep_expr: hl.expr.StructExpression) -> hl.expr.ArrayExpres
             },
         )
 
-        # pull the required fields and ordering from config
-        csq_fields = config_retrieve(['RunHailFiltering', 'csq_string'])
-
-        return hl.delimit([hl.or_else(hl.str(fields.get(f, '')), '') for f in csq_fields], '|')
+        # fields absent from the struct are a constant empty string, no per-row cast or default required
+        return hl.delimit([as_csq_string(fields[f]) if f in fields else hl.str('') for f in csq_fields], '|')
 
     csq = hl.empty_array(hl.tstr)
     csq = csq.extend(
@@ -737,14 +868,15 @@ def filter_to_categorised(mt: hl.MatrixTable) -> hl.MatrixTable:
         input matrix, minus rows without Categories applied
     """
 
+    # the logical OR short-circuits, so test the cheap integer flags before any string comparisons
     return mt.filter_rows(
         (mt.info.categoryboolean1 == 1)
         | (mt.info.categoryboolean6 == 1)
         | (mt.info.categoryboolean3 == 1)
-        | (mt.info.categorysample4 != MISSING_STRING)
         | (mt.info.categoryboolean5 == 1)
-        | (mt.info.categorydetailspm5 != MISSING_STRING)
         | (mt.info.categorybooleansvdb == 1)
+        | (mt.info.categorysample4 != MISSING_STRING)
+        | (mt.info.categorydetailspm5 != MISSING_STRING)
         | (mt.info.categorydetailsexomiser != MISSING_STRING),
     )
 
@@ -788,7 +920,36 @@ def green_from_panelapp(panel_data: PanelApp) -> hl.SetExpression:
     # take all the green genes, remove the metadata
     green_genes = set(panel_data.genes.keys())
     get_logger().info(f'Extracted {len(green_genes)} green genes')
-    return hl.literal(green_genes)
+    # typed up front, so Hail doesn't infer a type from every one of the gene IDs
+    return hl.literal(green_genes, dtype=hl.tset(hl.tstr))
+
+
+def green_contig_intervals(panel_data: PanelApp) -> list[hl.Interval] | None:
+    """
+    whole-contig intervals covering every contig with at least one Green gene
+    used to skip reading partitions on contigs which can't contain a variant of interest
+
+    Args:
+        panel_data (PanelApp): the PanelApp object
+
+    Returns:
+        a list of GRCh38 contig intervals, or None if any gene's contig is absent or unrecognised
+    """
+
+    reference = hl.get_reference('GRCh38')
+    contigs: set[str] = set()
+    for gene in panel_data.genes.values():
+        contig = 'chrM' if gene.chrom in {'M', 'MT'} else f'chr{gene.chrom}'
+        if not gene.chrom or contig not in reference.lengths:
+            get_logger().info(f'Contig {gene.chrom!r} for {gene.symbol} not recognised, reading all contigs')
+            return None
+        contigs.add(contig)
+
+    get_logger().info(f'Green genes are on contigs: {", ".join(sorted(contigs))}')
+    return [
+        hl.Interval(hl.Locus(contig, 1, reference), hl.Locus(contig, reference.lengths[contig], reference), True, True)
+        for contig in sorted(contigs)
+    ]
 
 
 def subselect_mt_to_pedigree(mt: hl.MatrixTable, pedigree: str) -> hl.MatrixTable:
@@ -809,8 +970,8 @@ def subselect_mt_to_pedigree(mt: hl.MatrixTable, pedigree: str) -> hl.MatrixTabl
     for family in open_ped(pedigree):
         ped_samples.update({member.id for member in family})
 
-    # individual IDs from matrix
-    matrix_samples = set(mt.s.collect())
+    # individual IDs from matrix, de-duplicated in the JVM rather than as a driver-side list
+    matrix_samples: set[str] = mt.aggregate_cols(hl.agg.collect_as_set(mt.s))
 
     # find overlapping samples
     common_samples: set[str] = ped_samples.intersection(matrix_samples)
@@ -830,9 +991,11 @@ def subselect_mt_to_pedigree(mt: hl.MatrixTable, pedigree: str) -> hl.MatrixTabl
     if common_samples == matrix_samples:
         return mt
 
-    # reduce to those common samples
-    mt = mt.filter_cols(hl.literal(common_samples).contains(mt.s))
-    get_logger().info(f'Remaining MatrixTable columns: {mt.count_cols()}')
+    # reduce to those common samples - typing the literal up front skips type inference over every sample ID
+    mt = mt.filter_cols(hl.literal(common_samples, dtype=hl.tset(hl.tstr)).contains(mt.s))
+
+    # columns are keyed on sample ID, so the remaining column count is already known without running a job
+    get_logger().info(f'Remaining MatrixTable columns: {len(common_samples)}')
 
     return mt
 
@@ -850,7 +1013,8 @@ def generate_a_checkpoint(mt: hl.MatrixTable, checkpoint_path: str) -> hl.Matrix
     get_logger().info(f'Checkpointing to {checkpoint_path} after filtering out a ton of variants')
     mt = mt.checkpoint(checkpoint_path)
 
-    # die if there are no variants remaining. Only ever count rows after a checkpoint
+    # die if there are no variants remaining. Only ever count rows after a checkpoint - on a freshly
+    # read MT the count comes from the partition counts in the written metadata, so no extra job is run
     if not (current_rows := mt.count_rows()):
         raise ValueError('No remaining rows to process!')
 
@@ -938,9 +1102,21 @@ def main(
     green_expression = green_from_panelapp(panelapp)
 
     # read the matrix table from a localised directory
+    # count rows on the plain read, where Hail takes the count from the table metadata without running a job
     mt = hl.read_matrix_table(mt_path)
     get_logger().info(f'Loaded annotated MT from {mt_path}, size: {mt.count_rows()}, partitions: {mt.n_partitions()}')
 
+    # a sparsely partitioned input would leave cores idle - split it at read time, rather than with a shuffle
+    # decided on the full input, before any interval filtering removes partitions
+    if mt.n_partitions() < number_of_cores * MIN_PARTITIONS_PER_CORE:
+        mt = hl.read_matrix_table(mt_path, _n_partitions=number_of_cores * MIN_PARTITIONS_PER_CORE)
+
+    # skip any partitions on contigs without a single green gene, before any other work is done
+    if green_intervals := green_contig_intervals(panelapp):
+        mt = hl.filter_intervals(mt, green_intervals)
+        # only the partition count here - a row count on the filtered MT would scan the whole input
+        get_logger().info(f'Retained {mt.n_partitions()} partitions on contigs with green genes')
+
     # lookups for required fields all delegated to the hail_audit file
     if not (
         fields_audit(mt=mt, base_fields=BASE_FIELDS_REQUIRED, nested_fields=FIELDS_REQUIRED)
@@ -951,8 +1127,9 @@ def main(
     # repartition if required - local Hail with finite resources has struggled with some really high (~120k) partitions
     # this creates a local duplicate of the input data with far smaller partition counts, for less processing overhead
     if mt.n_partitions() > MAX_PARTITIONS:
-        get_logger().info('Shrinking partitions way down with a unshuffled repartition')
-        mt = mt.repartition(shuffle=False, n_partitions=number_of_cores * 10)
+        # naive_coalesce merges runs of adjacent partitions, with no shuffle and no key-range sampling
+        get_logger().info('Shrinking partitions way down with a naive coalesce')
+        mt = mt.naive_coalesce(number_of_cores * 10)
         if checkpoint:
             get_logger().info('Trying to write the result locally, might need more space on disk...')
             mt = generate_a_checkpoint(mt, f'{checkpoint}_reparitioned')
@@ -966,6 +1143,9 @@ def main(
     # remove any rows which have no genes of interest
     mt = remove_variants_outside_gene_roi(mt=mt, green_genes=green_expression)
 
+    # running global quality filter steps - this doesn't depend on any annotations, so runs before the first checkpoint
+    mt = filter_to_well_normalised(mt=mt)
+
     if checkpoint:
         mt = generate_a_checkpoint(mt, f'{checkpoint}_green_genes')
 
@@ -978,17 +1158,9 @@ def main(
     # if a SVDB data is provided, use that to apply category annotations
     mt = annotate_splicevardb(mt=mt, svdb_path=svdb)
 
-    # remove common-in-gnomad variants (also includes ClinVar annotation)
-    mt = filter_to_population_rare(mt=mt)
-
-    # filter out quality failures
-    mt = filter_on_quality_flags(mt=mt)
-
-    # running global quality filter steps
-    mt = filter_to_well_normalised(mt=mt)
-
-    # filter variants by frequency
-    mt = filter_matrix_by_ac(mt=mt)
+    # remove common-in-gnomad, quality-failing, and common-in-callset variants, in a single filter
+    # each of these is overridden by ClinVar Pathogenic, SpliceVarDB, or Exomiser annotations
+    mt = filter_rare_and_high_quality(mt=mt)
 
     # rearrange the row annotation to make syntax nicer downstream
     mt = extract_annotations(mt=mt)
@@ -1000,17 +1172,18 @@ def main(
         mt = generate_a_checkpoint(mt, f'{checkpoint}_green_and_clean')
 
     # add Labels to the MT
-    # current logic is to apply 1, 2, 3, and 5, then 4 (de novo)
+    # current logic is to apply 1, 3, 5, and 6 in one pass, then 4 (de novo)
     # for cat. 4, pre-filter the variants by tx-consequential or C5==1
     get_logger().info('Applying categories')
-    mt = annotate_category_1(mt=mt)
-    mt = annotate_category_6(mt=mt)
-    mt = annotate_category_3(mt=mt)
-    mt = annotate_category_5(mt=mt)
+    mt = annotate_row_categories(mt=mt)
 
     # ordering is important - category4 (de novo) makes
     # use of category 5, so it must follow
-    mt = annotate_category_4(mt=mt, ped_file_path=pedigree)
+    mt = annotate_category_4(
+        mt=mt,
+        ped_file_path=pedigree,
+        checkpoint=f'{checkpoint}_de_novo.ht' if checkpoint else None,
+    )
 
     # if a clinvar-codon table is supplied, use that for PM5
     mt = annotate_codon_clinvar(mt=mt, pm5_path=pm5)
@@ -9,6 +9,8 @@ CategoryBooleanSV1:
 
 from argparse import ArgumentParser
 
+from cloudpathlib.anypath import to_anypath
+
 import hail as hl
 
 from talos.config import config_retrieve
@@ -18,77 +20,76 @@ from talos.static_values import get_logger
 from talos.utils import read_json_from_path
 
 
-def filter_matrix_by_af(mt: hl.MatrixTable, af_threshold: float = 0.03) -> hl.MatrixTable:
+def population_rare_expr(mt: hl.MatrixTable, af_threshold: float = 0.03) -> hl.BooleanExpression:
+    """
+    true for SVs rare in gnomad v2.1, allowing AF to be missing
     """
-    Filter a MatrixTable on AF, allow AF to be missing
+    return hl.or_else(mt.info['gnomad_v2.1_sv_AF'], MISSING_INT) < af_threshold
 
-    Args:
-        mt (hl.MatrixTable): the input MT
-        af_threshold (float): filtering threshold in gnomad v2.1
 
-    Returns:
-        same MT, with common variants removed
+def callset_rare_expr(mt: hl.MatrixTable, ac_threshold: float = 0.03) -> hl.BooleanExpression:
     """
-
-    return mt.filter_rows(hl.or_else(mt.info['gnomad_v2.1_sv_AF'], MISSING_INT) < af_threshold)
+    true for SVs rare in both male and female samples of this joint-call
+    """
+    return (mt.info.MALE_AF[0] <= ac_threshold) & (mt.info.FEMALE_AF[0] <= ac_threshold)
 
 
-def restructure_mt_by_gene(mt: hl.MatrixTable) -> hl.MatrixTable:
+def restructure_mt_by_gene(mt: hl.MatrixTable, green_expression: hl.SetExpression) -> hl.MatrixTable:
     """
-    split each transcript consequence annotation onto a separate row
+    split each LOF-in-a-green-gene transcript consequence annotation onto a separate row
+
+    consequences are filtered before the explode, so only the rows which could be labelled are ever created
+    SVs without any such consequence are dropped here
 
     Args:
         mt (hl.MatrixTable): the input MT
+        green_expression (hl.SetExpression): the set of green genes
 
     Returns:
         hl.MatrixTable: the filtered MT
     """
 
+    mt = mt.annotate_rows(
+        sortedTranscriptConsequences=mt.sortedTranscriptConsequences.filter(
+            lambda tc: (tc.major_consequence == 'LOF') & green_expression.contains(tc.gene_id),
+        ),
+    )
+    mt = mt.filter_rows(hl.len(mt.sortedTranscriptConsequences) > 0)
+
     # split out consequences
     mt = mt.explode_rows(mt.sortedTranscriptConsequences)
     return mt.annotate_rows(info=mt.info.annotate(gene_id=mt.sortedTranscriptConsequences.gene_id))
 
 
-def annotate_sv1(mt: hl.MatrixTable, green_expression: hl.SetExpression) -> hl.MatrixTable:
+def annotate_sv1(mt: hl.MatrixTable) -> hl.MatrixTable:
     """
     Annotate SVs with the SV1 category
-    Rare, LOF, in a green gene
+    Rare, LOF, in a green gene - the LOF and green gene conditions are applied in restructure_mt_by_gene
 
     Args:
-        mt (hl.MatrixTable): the input MT
-        green_expression (hl.SetExpression): the set of green genes
+        mt (hl.MatrixTable): the input MT, restructured to one LOF-in-a-green-gene consequence per row
 
     Returns:
         hl.MatrixTable: the annotated MT
     """
 
-    # filter again to LOF in green genes
-    return mt.annotate_rows(
-        info=mt.info.annotate(
-            categorybooleansv1=hl.if_else(
-                (mt.sortedTranscriptConsequences.major_consequence == 'LOF')
-                & (green_expression.contains(mt.sortedTranscriptConsequences.gene_id)),
-                ONE_INT,
-                MISSING_INT,
-            ),
-        ),
-    )
+    return mt.annotate_rows(info=mt.info.annotate(categorybooleansv1=ONE_INT))
 
 
-def filter_matrix_by_ac(mt: hl.MatrixTable, ac_threshold: float | None = 0.03) -> hl.MatrixTable:
+def filter_matrix_by_ac_and_af(mt: hl.MatrixTable, ac_threshold: float, af_threshold: float) -> hl.MatrixTable:
     """
-    Remove variants with AC in joint-call over threshold
-    We don't need to worry about minimum cohort size
-    due to the minimum group size of GATK-SV
+    the joint-call AC and gnomad AF filters, as a single filter_rows
 
     Args:
-        mt (hl.MatrixTable):
+        mt (hl.MatrixTable): the input MT
         ac_threshold (float): remove variants more common than this in JointCall
+        af_threshold (float): filtering threshold in gnomad v2.1
+
     Returns:
-        MT with all common-in-this-JC variants removed
+        MT with all common variants removed
     """
 
-    return mt.filter_rows((mt.info.MALE_AF[0] <= ac_threshold) & (mt.info.FEMALE_AF[0] <= ac_threshold))
+    return mt.filter_rows(callset_rare_expr(mt, ac_threshold) & population_rare_expr(mt, af_threshold))
 
 
 def rearrange_variant_id(mt: hl.MatrixTable) -> hl.MatrixTable:
@@ -160,6 +161,19 @@ def main(mt_path: str, panelapp_path: str, pedigree: str, vcf_out: str):
         (SV style)""",
     )
 
+    # fail on a missing input before starting up Hail
+    if not to_anypath(mt_path).exists():
+        raise FileNotFoundError(f'The input MatrixTable {mt_path!r} does not exist')
+
+    # initiate Hail in local cluster mode
+    number_of_cores = config_retrieve(['RunHailFiltering', 'cores', 'sv'], 2)
+    get_logger().info(f'Starting Hail with reference genome GRCh38, as a {number_of_cores} core local cluster')
+    hl.context.init_spark(master=f'local[{number_of_cores}]', quiet=True)
+    hl.default_reference('GRCh38')
+
+    # read in the input data (annotated)
+    mt = hl.read_matrix_table(mt_path)
+
     # read the parsed panelapp data
     get_logger().info(f'Reading PanelApp data from {panelapp_path!r}')
     panelapp = read_json_from_path(panelapp_path, return_model=PanelApp)
@@ -170,37 +184,30 @@ def main(mt_path: str, panelapp_path: str, pedigree: str, vcf_out: str):
     # new is not currently incorporated in this analysis
     green_expression = green_from_panelapp(panelapp)
 
-    # initiate Hail in local cluster mode
-    number_of_cores = config_retrieve(['RunHailFiltering', 'cores', 'sv'], 2)
-    get_logger().info(f'Starting Hail with reference genome GRCh38, as a {number_of_cores} core local cluster')
-    hl.context.init_spark(master=f'local[{number_of_cores}]', quiet=True)
-    hl.default_reference('GRCh38')
-
-    # read in the input data (annotated) Not checking for existence; if it fails, it fails
-    mt = hl.read_matrix_table(mt_path)
-
     # subset to currently considered samples
     mt = subselect_mt_to_pedigree(mt, pedigree=pedigree)
 
-    # apply blanket filters
-    mt = filter_matrix_by_ac(mt, ac_threshold=config_retrieve(['RunHailFiltering', 'callset_af_sv_recessive']))
-    mt = filter_matrix_by_af(mt, af_threshold=config_retrieve(['RunHailFiltering', 'callset_af_sv_recessive']))
+    # apply blanket filters, in a single pass
+    af_threshold = config_retrieve(['RunHailFiltering', 'callset_af_sv_recessive'])
+    mt = filter_matrix_by_ac_and_af(mt, ac_threshold=af_threshold, af_threshold=af_threshold)
     mt = rearrange_variant_id(mt)
 
-    # pre-filter the MT and rearrange fields for export
-    mt = restructure_mt_by_gene(mt)
+    # pre-filter the MT to LOF consequences in green genes, and rearrange fields for export
+    mt = restructure_mt_by_gene(mt, green_expression)
 
-    # label some SVs
-    mt = annotate_sv1(mt, green_expression)
+    # label some SVs - every remaining row qualifies
+    mt = annotate_sv1(mt)
 
     # add further category annotations here
 
-    # filter to labelled entries
-    mt = mt.filter_rows(mt.info.categorybooleansv1 == ONE_INT)
-
     # Hail's MT -> VCF export doesn't handle hemizygous calls
     mt = fix_hemi_calls(mt)
 
+    # only the standard VCF row fields are exported, drop the rest rather than carry them through to the write
+    mt = mt.select_rows(*[field for field in ('rsid', 'qual', 'filters', 'info') if field in mt.row_value])
+    # GT is the only entry field read back from the SV VCF
+    mt = mt.select_entries('GT')
+
     # now write that badboi
     hl.export_vcf(mt, vcf_out, tabix=True)
 
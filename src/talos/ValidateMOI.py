@@ -13,11 +13,14 @@ participants relative to the MOI described in PanelApp
 
 from argparse import ArgumentParser
 from collections import defaultdict
+from operator import attrgetter
 
 from cyvcf2 import VCFReader
+from pydantic_core import to_json
 
 from talos.config import config_retrieve
 from talos.models import (
+    Coordinates,
     FamilyMembers,
     MemberSex,
     PanelApp,
@@ -205,6 +208,16 @@ def clean_and_filter(
 
     gene_details: dict[str, set[int]] = {}
 
+    default_panel = config_retrieve(['GeneratePanelData', 'default_panel'], 137)
+
+    # index the retained events by sample & position (the ReportVariant equivalence), so each duplicate check is a
+    # single dict lookup rather than a scan of that sample's growing list of variants
+    retained_events: dict[tuple[str, Coordinates], ReportVariant] = {
+        (event.sample, event.var_data.coordinates): event
+        for sample_results in results_holder.results.values()
+        for event in sample_results.variants
+    }
+
     for each_event in result_list:
         # shouldn't be possible, here as a precaution
         if not each_event.categories:
@@ -237,11 +250,7 @@ def clean_and_filter(
             if not phenotype_intersection.union(cohort_intersection):
                 continue
 
-            matched_panels = {
-                pid: panel_meta[pid]
-                for pid in phenotype_intersection
-                if pid != config_retrieve(['GeneratePanelData', 'default_panel'], 137)
-            }
+            matched_panels = {pid: panel_meta[pid] for pid in phenotype_intersection if pid != default_panel}
 
         # don't remove variants here, we do that in the pheno-matching stage
         each_event.panels = ReportPanel(matched=matched_panels, forced=forced_panels)
@@ -250,14 +259,12 @@ def clean_and_filter(
         # If this variant and that variant have same sample/pos, equivalent
         # If either was independent, set that flag to True
         # Add a union of all Support Variants from both events
-        if each_event not in results_holder.results[each_event.sample].variants:
+        event_key = (each_event.sample, each_event.var_data.coordinates)
+        if (prev_event := retained_events.get(event_key)) is None:
+            retained_events[event_key] = each_event
             results_holder.results[each_event.sample].variants.append(each_event)
 
         else:
-            prev_event = results_holder.results[each_event.sample].variants[
-                results_holder.results[each_event.sample].variants.index(each_event)
-            ]
-
             # if this is independent, set independent to True
             if each_event.independent:
                 prev_event.independent = True
@@ -275,8 +282,9 @@ def clean_and_filter(
             prev_event.flags = both_flags
 
     # organise the variants by chromosomal location... why?
+    # build each variant's sort key once, instead of chaining through ReportVariant.__lt__ on every comparison
     for sample in results_holder.results:
-        results_holder.results[sample].variants.sort()
+        results_holder.results[sample].variants.sort(key=attrgetter('var_data.coordinates.sort_key'))
 
     return results_holder
 
@@ -532,8 +540,8 @@ def main(
 
     # write the output to long term storage using Pydantic
     # validate the model against the schema, then write the result if successful
-    with open(output, 'w') as out_file:
-        out_file.write(ResultData.model_validate(results_model).model_dump_json(indent=4))
+    with open(output, 'wb') as out_file:
+        out_file.write(to_json(ResultData.model_validate(results_model), indent=4))
 
 
 if __name__ == '__main__':
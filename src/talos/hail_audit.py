@@ -90,6 +90,10 @@ USELESS_FIELDS = [
     'vep_proc_id',
 ]
 
+# the only entry fields read after the MT is loaded - GT/GQ/PL for de novo calling,
+# and GT/AD/DP/GQ/PS/PGT/PID exported in the VCF for ValidateMOI
+ENTRY_FIELDS_USED = ['GT', 'AD', 'DP', 'GQ', 'PL', 'PS', 'PGT', 'PID']
+
 
 def fields_audit(mt: hl.MatrixTable, base_fields: list[tuple], nested_fields: dict) -> bool:
     """
@@ -3,6 +3,7 @@ A home for all data models used in Talos
 """
 
 from enum import Enum
+from functools import cached_property, total_ordering
 from typing import Any
 
 from pydantic import BaseModel, Field
@@ -17,6 +18,8 @@ from talos.static_values import get_granular_date, get_logger
 
 NON_HOM_CHROM = ['X', 'Y', 'MT', 'M']
 CHROM_ORDER = list(map(str, range(1, 23))) + NON_HOM_CHROM
+# position of each canonical contig in the sort order, anything else (HLA, decoys...) sorts after all of these
+CHROM_INDEX = {chrom: index for index, chrom in enumerate(CHROM_ORDER)}
 
 # some kind of version tracking
 CURRENT_VERSION = '1.1.0'
@@ -51,6 +54,7 @@ class PhenoPacketHpo(BaseModel):
     label: str
 
 
+@total_ordering
 class Coordinates(BaseModel):
     """
     A representation of genomic coordinates
@@ -68,20 +72,21 @@ class Coordinates(BaseModel):
         """
         return f'{self.chrom}-{self.pos}-{self.ref}-{self.alt}'
 
+    @property
+    def sort_key(self) -> tuple[int, str, int]:
+        """
+        canonical contigs in CHROM_ORDER, then any other contigs by name, then position
+        """
+        return CHROM_INDEX.get(self.chrom, len(CHROM_ORDER)), self.chrom, self.pos
+
     def __lt__(self, other) -> bool:
         """
         enables positional sorting
         """
-        # this will return False for same chrom and position
-        if self.chrom == other.chrom:
-            return self.pos < other.pos
-        # otherwise take the relative index from sorted chromosomes list
-        if self.chrom in CHROM_ORDER and other.chrom in CHROM_ORDER:
-            return CHROM_ORDER.index(self.chrom) < CHROM_ORDER.index(other.chrom)
-        # if self is on a canonical chromosome, sort before HLA/Decoy etc.
-        if self.chrom in CHROM_ORDER:
-            return True
-        return False
+        return self.sort_key < other.sort_key
+
+    def __hash__(self) -> int:
+        return hash((self.chrom, self.pos, self.ref, self.alt))
 
 
 class VariantCommon(BaseModel):
@@ -107,21 +112,23 @@ class VariantCommon(BaseModel):
     def __eq__(self, other):
         return self.coordinates == other.coordinates
 
-    @property
+    @cached_property
     def has_boolean_categories(self) -> bool:
         """
         check that the variant has at least one assigned class
+        the category flags are fixed once the variant is built, so this and all the
+        derived classification checks are each calculated once, on first access
         """
         return any(self.info[value] for value in self.boolean_categories)
 
-    @property
+    @cached_property
     def has_sample_categories(self) -> bool:
         """
         check that the variant has any list-category entries
         """
         return any(self.info[value] for value in self.sample_categories)
 
-    @property
+    @cached_property
     def has_support(self) -> bool:
         """
         check for a True flag in any CategorySupport* attribute
@@ -130,7 +137,7 @@ class VariantCommon(BaseModel):
         """
         return any(self.info[value] for value in self.sample_support)
 
-    @property
+    @cached_property
     def category_non_support(self) -> bool:
         """
         check the variant has at least one non-support category assigned
@@ -139,7 +146,7 @@ class VariantCommon(BaseModel):
         """
         return self.has_sample_categories or self.has_boolean_categories
 
-    @property
+    @cached_property
     def is_classified(self) -> bool:
         """
         check for at least one assigned class, inc. support
@@ -148,7 +155,7 @@ class VariantCommon(BaseModel):
         """
         return self.category_non_support or self.has_support
 
-    @property
+    @cached_property
     def support_only(self) -> bool:
         """
         check that the variant is exclusively cat. support
@@ -157,6 +164,15 @@ class VariantCommon(BaseModel):
         """
         return self.has_support and not self.category_non_support
 
+    @cached_property
+    def all_samples(self) -> frozenset[str]:
+        """
+        all samples with a variant call, het or hom
+        Returns:
+            the union of het and hom samples
+        """
+        return frozenset(self.het_samples | self.hom_samples)
+
     def sample_support_only(self, sample_id: str) -> bool:
         """
         check that the variant is exclusively cat. support
@@ -167,6 +183,20 @@ class VariantCommon(BaseModel):
         """
         return self.has_support and not (self.category_non_support or self.sample_categorised_check(sample_id))
 
+    @cached_property
+    def sample_category_sets(self) -> dict[str, frozenset[str]]:
+        """
+        the samples listed in each sample category, as sets for constant-time membership checks
+        built once per variant, on first access
+        """
+        category_sets: dict[str, frozenset[str]] = {}
+        for category in self.sample_categories:
+            cat_samples = self.info[category]
+            if not isinstance(cat_samples, list):
+                raise TypeError(f'Sample categories should be a list: {cat_samples}')
+            category_sets[category] = frozenset(cat_samples)
+        return category_sets
+
     def category_values(self, sample: str) -> set[str]:
         """
         get all variant categories
@@ -180,14 +210,11 @@ class VariantCommon(BaseModel):
         """
 
         # step down all category flags to boolean flags
-        categories: set[str] = set()
-        for category in self.sample_categories:
-            cat_samples = self.info[category]
-            print(cat_samples, category)
-            if not isinstance(cat_samples, list):
-                raise TypeError(f'Sample categories should be a list: {cat_samples}')
-            if sample in cat_samples:
-                categories.add(category.removeprefix('categorysample'))
+        categories: set[str] = {
+            category.removeprefix('categorysample')
+            for category, cat_samples in self.sample_category_sets.items()
+            if sample in cat_samples
+        }
 
         categories.update(
             {bool_cat.replace('categoryboolean', '') for bool_cat in self.boolean_categories if self.info[bool_cat]},
@@ -209,13 +236,9 @@ class VariantCommon(BaseModel):
             bool: True if this sample features in any
                   named-sample category, includes 'all'
         """
-        for category in self.sample_categories:
-            cat_samples = self.info[category]
-            assert isinstance(cat_samples, list)
-            if any(sam in cat_samples for sam in [sample_id, 'all']):
-                return True
-
-        return False
+        return any(
+            sample_id in cat_samples or 'all' in cat_samples for cat_samples in self.sample_category_sets.values()
+        )
 
     def sample_category_check(self, sample_id: str, allow_support: bool = True) -> bool:
         """
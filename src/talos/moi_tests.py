@@ -58,11 +58,10 @@ def check_for_second_hit(
         a list of variants which are potential partners
     """
 
-    # check if the sample has any comp-hets
-    if sample not in comp_hets:
+    # check if the sample has any comp-het partners for this variant
+    if not (partners := comp_hets.get(sample, {}).get(first_variant)):
         return []
 
-    partners = comp_hets[sample].get(first_variant, [])
     if require_non_support:
         return [partner for partner in partners if not partner.sample_support_only(sample)]
     return partners
@@ -87,33 +86,14 @@ class MOIRunner:
             target_moi ():
         """
 
-        # for unknown, we catch all possible options?
-        # should we be doing both checks for Monoallelic?
-        if target_moi == 'Monoallelic':
-            self.filter_list = [DominantAutosomal(pedigree=pedigree)]
-        elif target_moi in ['Mono_And_Biallelic', 'Unknown']:
-            self.filter_list = [
-                DominantAutosomal(pedigree=pedigree),
-                RecessiveAutosomalHomo(pedigree=pedigree),
-                RecessiveAutosomalCH(pedigree=pedigree),
-            ]
-        elif target_moi == 'Biallelic':
-            self.filter_list = [RecessiveAutosomalHomo(pedigree=pedigree), RecessiveAutosomalCH(pedigree=pedigree)]
-
-        elif target_moi == 'Hemi_Mono_In_Female':
-            self.filter_list = [XRecessiveMale(pedigree=pedigree), XDominant(pedigree=pedigree)]
-
-        elif target_moi == 'Hemi_Bi_In_Female':
-            self.filter_list = [
-                XRecessiveMale(pedigree=pedigree),
-                XRecessiveFemaleHom(pedigree=pedigree),
-                XRecessiveFemaleCH(pedigree=pedigree),
-                XPseudoDominantFemale(pedigree=pedigree),
-            ]
-
-        else:
+        if target_moi not in MOI_FILTERS:
             raise KeyError(f'MOI type {target_moi} is not addressed in MOI')
 
+        self.filter_list = [moi_filter(pedigree=pedigree) for moi_filter in MOI_FILTERS[target_moi]]
+
+        # bind each filter's run method once, rather than resolving it for every variant
+        self._runners = tuple(model.run for model in self.filter_list)
+
     def run(self, principal_var, comp_het: CompHetDict | None = None, partial_pen: bool = False) -> list[ReportVariant]:
         """
         run method - triggers each relevant inheritance model
@@ -124,12 +104,16 @@ class MOIRunner:
             partial_pen ():
         """
 
+        # every filter works from the samples carrying this variant, so with no carriers there's nothing to find
+        if not (principal_var.het_samples or principal_var.hom_samples):
+            return []
+
         if comp_het is None:
             comp_het = {}
 
         moi_matched = []
-        for model in self.filter_list:
-            moi_matched.extend(model.run(principal=principal_var, comp_het=comp_het, partial_pen=partial_pen))
+        for runner in self._runners:
+            moi_matched.extend(runner(principal=principal_var, comp_het=comp_het, partial_pen=partial_pen))
         return moi_matched
 
 
@@ -148,6 +132,11 @@ class BaseMoi:
         self.applied_moi = applied_moi
         self.minimum_depth = config_retrieve(['RunHailFiltering', 'minimum_depth'], 10)
 
+        # affected status and sex are checked for every sample on every variant, so look these up once
+        self._affected = frozenset(member.id for member in pedigree.members if member.affected == '2')
+        self._females = frozenset(member.id for member in pedigree.members if member.sex == '2')
+        self._males = frozenset(member.id for member in pedigree.members if member.sex == '1')
+
     @abstractmethod
     def run(
         self,
@@ -170,10 +159,7 @@ class BaseMoi:
             bool: True if the variant passes the depth checks
         """
         if (
-            not (
-                self.pedigree.by_id[sample_id].affected == '2'
-                and variant.sample_category_check(sample_id, allow_support=False)
-            )
+            not (sample_id in self._affected and variant.sample_category_check(sample_id, allow_support=False))
         ) or variant.check_read_depth(sample_id, self.minimum_depth, var_is_cat_1=variant.info.get('categoryboolean1')):
             return True
         return False
@@ -241,22 +227,17 @@ class BaseMoi:
                 str: text representation of this genotype
             """
 
-            if variant.coordinates.chrom in X_CHROMOSOME:
-                if sex == '1' and (member_id in variant.het_samples or member_id in variant.hom_samples):
-                    return 'Hemi'
-
-                if member_id in variant.het_samples:
-                    return 'Het'
-                if member_id in variant.hom_samples:
-                    return 'Hom'
-
-            elif member_id in variant.het_samples:
+            if on_x and sex == '1' and member_id in variant.all_samples:
+                return 'Hemi'
+            if member_id in variant.het_samples:
                 return 'Het'
-            elif member_id in variant.hom_samples:
+            if member_id in variant.hom_samples:
                 return 'Hom'
 
             return 'WT'
 
+        # the chromosome is the same for every family member, so only check it once
+        on_x = variant.coordinates.chrom in X_CHROMOSOME
         sample_family_id = self.pedigree.by_id[sample_id].family
         return {
             member.id: get_sample_genotype(member_id=member.id, sex=member.sex)
@@ -332,9 +313,10 @@ class DominantAutosomal(BaseMoi):
         self.sv_af_threshold = config_retrieve(['ValidateMOI', CALLSET_AF_SV_DOMINANT])
 
         # prepare the AF test dicts
+        # AF and AC come first, as these reject the most common variants before the hom counts are checked
         self.freq_tests = {
-            SmallVariant.__name__: {key: self.hom_threshold for key in INFO_HOMS}
-            | {'gnomad_ac': self.ac_threshold, 'gnomad_af': self.ad_threshold},
+            SmallVariant.__name__: {'gnomad_af': self.ad_threshold, 'gnomad_ac': self.ac_threshold}
+            | {key: self.hom_threshold for key in INFO_HOMS},
             StructuralVariant.__name__: {'af': self.sv_af_threshold, SV_AF_KEY: self.sv_af_threshold},
         }
         super().__init__(pedigree=pedigree, applied_moi=applied_moi)
@@ -365,15 +347,13 @@ class DominantAutosomal(BaseMoi):
             return classifications
 
         # autosomal dominant doesn't require support, but consider het and hom
-        samples_with_this_variant = principal.het_samples.union(principal.hom_samples)
-        for sample_id in samples_with_this_variant:
-            # skip primary analysis for unaffected members
+        samples_with_this_variant = principal.all_samples
+
+        # skip primary analysis for unaffected members
+        for sample_id in samples_with_this_variant & self._affected:
             # we require this specific sample to be categorised
             # force a minimum depth on the proband call
-            if not (
-                self.pedigree.by_id[sample_id].affected == '2'
-                and principal.sample_category_check(sample_id, allow_support=False)
-            ) or (
+            if not principal.sample_category_check(sample_id, allow_support=False) or (
                 principal.check_read_depth(
                     sample_id,
                     self.minimum_depth,
@@ -454,15 +434,12 @@ class RecessiveAutosomalCH(BaseMoi):
             return classifications
 
         # if hets are present, try and find support
-        for sample_id in principal.het_samples:
-            # skip primary analysis for unaffected members
+        # skip primary analysis for unaffected members
+        for sample_id in principal.het_samples & self._affected:
             # this sample must be categorised - check Cat 4 contents
-            if (
-                not (
-                    self.pedigree.by_id[sample_id].affected == '2'
-                    and principal.sample_category_check(sample_id, allow_support=True)
-                )
-            ) or (principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1'))):
+            if not principal.sample_category_check(sample_id, allow_support=True) or (
+                principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1'))
+            ):
                 continue
 
             for partner_variant in check_for_second_hit(
@@ -545,15 +522,13 @@ class RecessiveAutosomalHomo(BaseMoi):
         ):
             return classifications
 
-        for sample_id in principal.hom_samples:
-            # skip primary analysis for unaffected members
+        # skip primary analysis for unaffected members
+        for sample_id in principal.hom_samples & self._affected:
             # require this sample to be categorised - check Sample contents
             # minimum depth of call
-            if (
-                not (
-                    self.pedigree.by_id[sample_id].affected == '2'
-                    and principal.sample_category_check(sample_id, allow_support=False)
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=False,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -606,9 +581,9 @@ class XDominant(BaseMoi):
         self.hemi_threshold = config_retrieve(['ValidateMOI', GNOMAD_HEMI_THRESHOLD])
 
         self.freq_tests = {
-            SmallVariant.__name__: {key: self.hom_threshold for key in INFO_HOMS}
-            | {key: self.hemi_threshold for key in INFO_HEMI}
-            | {'gnomad_ac': self.ac_threshold, 'gnomad_af': self.ad_threshold},
+            SmallVariant.__name__: {'gnomad_af': self.ad_threshold, 'gnomad_ac': self.ac_threshold}
+            | {key: self.hom_threshold for key in INFO_HOMS}
+            | {key: self.hemi_threshold for key in INFO_HEMI},
             StructuralVariant.__name__: {key: self.hom_threshold for key in SV_HOMS}
             | {key: self.hemi_threshold for key in SV_HEMI},
         }
@@ -645,17 +620,15 @@ class XDominant(BaseMoi):
             return classifications
 
         # all samples which have a variant call
-        samples_with_this_variant = principal.het_samples.union(principal.hom_samples)
+        samples_with_this_variant = principal.all_samples
 
-        for sample_id in samples_with_this_variant:
-            # skip primary analysis for unaffected members
+        # skip primary analysis for unaffected members
+        for sample_id in samples_with_this_variant & self._affected:
             # we require this specific sample to be categorised
             # force minimum depth
-            if (
-                not (
-                    principal.sample_category_check(sample_id, allow_support=False)
-                    and self.pedigree.by_id[sample_id].affected == '2'
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=False,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -705,8 +678,8 @@ class XPseudoDominantFemale(BaseMoi):
         self.hom_threshold = config_retrieve(['ValidateMOI', GNOMAD_DOM_HOM_THRESHOLD])
 
         self.freq_tests = {
-            SmallVariant.__name__: {key: self.hom_threshold for key in INFO_HOMS}
-            | {'gnomad_ac': self.ac_threshold, 'gnomad_af': self.ad_threshold},
+            SmallVariant.__name__: {'gnomad_af': self.ad_threshold, 'gnomad_ac': self.ac_threshold}
+            | {key: self.hom_threshold for key in INFO_HOMS},
             StructuralVariant.__name__: {key: self.hom_threshold for key in SV_HOMS},
         }
 
@@ -743,18 +716,15 @@ class XPseudoDominantFemale(BaseMoi):
         ):
             return classifications
 
-        # all females which have a variant call
-        females_under_consideration = {sam for sam in principal.het_samples if self.pedigree.by_id[sam].sex == '2'}
-        all_with_variant = principal.het_samples.union(principal.hom_samples)
+        # all affected females which have a het variant call, skip primary analysis for unaffected members
+        females_under_consideration = principal.het_samples & self._females & self._affected
+        all_with_variant = principal.all_samples
         for sample_id in females_under_consideration:
-            # skip primary analysis for unaffected members
             # we require this specific sample to be categorised
             # force minimum depth
-            if (
-                not (
-                    principal.sample_category_check(sample_id, allow_support=False)
-                    and self.pedigree.by_id[sample_id].affected == '2'
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=False,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -842,17 +812,13 @@ class XRecessiveMale(BaseMoi):
         # combine het and hom here, we don't trust the variant callers
         # if hemi count is too high, don't consider males
         # never consider support variants on X for males
-        males = {
-            sam for sam in principal.het_samples.union(principal.hom_samples) if self.pedigree.by_id[sam].sex == '1'
-        }
+        males = principal.all_samples & self._males
 
-        for sample_id in males:
+        for sample_id in males & self._affected:
             # specific affected sample category check, never consider support on X for males
-            if (
-                not (
-                    self.pedigree.by_id[sample_id].affected == '2'
-                    and principal.sample_category_check(sample_id, allow_support=False)
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=False,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -921,15 +887,13 @@ class XRecessiveFemaleHom(BaseMoi):
             return classifications
 
         # never consider support homs
-        samples_to_check = {sam for sam in principal.hom_samples if self.pedigree.by_id[sam].sex == '2'}
+        samples_to_check = principal.hom_samples & self._females
 
-        for sample_id in samples_to_check:
+        for sample_id in samples_to_check & self._affected:
             # specific affected sample category check
-            if (
-                not (
-                    self.pedigree.by_id[sample_id].affected == '2'
-                    and principal.sample_category_check(sample_id, allow_support=False)
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=False,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -1002,17 +966,14 @@ class XRecessiveFemaleCH(BaseMoi):
             self.freq_tests[principal.__class__.__name__],
         ):
             return classifications
-        het_females = {sam for sam in principal.het_samples if self.pedigree.by_id[sam].sex == '2'}
 
         # if het females are present, try and find support
-        for sample_id in het_females:
-            # don't run primary analysis for unaffected
+        # don't run primary analysis for unaffected
+        for sample_id in principal.het_samples & self._females & self._affected:
             # we require this specific sample to be categorised - check Cat 4 contents
-            if (
-                not (
-                    self.pedigree.by_id[sample_id].affected == '2'
-                    and principal.sample_category_check(sample_id, allow_support=True)
-                )
+            if not principal.sample_category_check(
+                sample_id,
+                allow_support=True,
             ) or principal.check_read_depth(sample_id, self.minimum_depth, principal.info.get('categoryboolean1')):
                 continue
 
@@ -1053,3 +1014,16 @@ class XRecessiveFemaleCH(BaseMoi):
                 )
 
         return classifications
+
+
+# the MOI filters applied for each simplified PanelApp MOI, used by MOIRunner
+MOI_FILTERS: dict[str, list[type[BaseMoi]]] = {
+    # should we be doing both checks for Monoallelic?
+    'Monoallelic': [DominantAutosomal],
+    'Mono_And_Biallelic': [DominantAutosomal, RecessiveAutosomalHomo, RecessiveAutosomalCH],
+    # for unknown, we catch all possible options
+    'Unknown': [DominantAutosomal, RecessiveAutosomalHomo, RecessiveAutosomalCH],
+    'Biallelic': [RecessiveAutosomalHomo, RecessiveAutosomalCH],
+    'Hemi_Mono_In_Female': [XRecessiveMale, XDominant],
+    'Hemi_Bi_In_Female': [XRecessiveMale, XRecessiveFemaleHom, XRecessiveFemaleCH, XPseudoDominantFemale],
+}
@@ -6,12 +6,12 @@ https://tenacity.readthedocs.io/en/latest/
 """
 
 import httpx
-import json
 import re
 import string
 import zoneinfo
 from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache
 from itertools import chain, combinations_with_replacement, islice
 from pathlib import Path
 from random import choices
@@ -22,6 +22,7 @@ import cyvcf2
 from cloudpathlib.anypath import to_anypath
 import hail as hl
 from peds import open_ped
+from pydantic_core import from_json
 from tenacity import retry, stop_after_attempt, wait_exponential_jitter, retry_if_exception_type
 
 from talos.config import config_retrieve
@@ -202,7 +203,7 @@ def identify_file_type(file_path: str) -> FileTypes | Exception:
     ),
     reraise=True,
 )
-def get_json_response(url):
+def get_json_response(url, client: httpx.Client | None = None):
     """
     takes a request URL, checks for healthy response, returns the JSON
     For this purpose we only expect a dictionary return
@@ -212,11 +213,12 @@ def get_json_response(url):
 
     Args:
         url (str): URL to retrieve JSON format data from
+        client (httpx.Client): optional, a shared client to reuse pooled connections across repeated calls
 
     Returns:
         the JSON response from the endpoint
     """
-    response = httpx.get(url, headers={'Accept': 'application/json'}, timeout=60, follow_redirects=True)
+    response = (client or httpx).get(url, headers={'Accept': 'application/json'}, timeout=60, follow_redirects=True)
     if response.is_success:
         return response.json()
     raise ValueError('The JSON response could not be parsed successfully')
@@ -485,7 +487,13 @@ def create_small_variant(
         samples ():
     """
 
-    coordinates = Coordinates(chrom=var.CHROM.replace('chr', ''), pos=var.POS, ref=var.REF, alt=var.ALT[0])
+    # built once per VCF row from already-typed cyvcf2 values - model_construct skips re-validating each field
+    coordinates = Coordinates.model_construct(
+        chrom=var.CHROM.replace('chr', ''),
+        pos=var.POS,
+        ref=var.REF,
+        alt=var.ALT[0],
+    )
     depths: dict[str, int] = dict(zip(samples, map(int, var.gt_depths)))
     info: dict[str, Any] = {x.lower(): y for x, y in var.INFO} | {'seqr_link': coordinates.string_format}
 
@@ -532,7 +540,7 @@ def create_small_variant(
     ab_ratios = dict(zip(samples, map(float, var.gt_alt_freqs)))
     transcript_consequences = extract_csq(csq_contents=info.pop('csq', ''))
 
-    return SmallVariant(
+    return SmallVariant.model_construct(
         coordinates=coordinates,
         info=info,
         het_samples=het_samples,
@@ -566,7 +574,12 @@ def create_structural_variant(var: cyvcf2.Variant, samples: list[str]):
     # this is the right ID for Seqr
     info['seqr_link'] = info['variantid']
 
-    coordinates = Coordinates(chrom=var.CHROM.replace('chr', ''), pos=var.POS, ref=var.ALT[0], alt=str(info['svlen']))
+    coordinates = Coordinates.model_construct(
+        chrom=var.CHROM.replace('chr', ''),
+        pos=var.POS,
+        ref=var.ALT[0],
+        alt=str(info['svlen']),
+    )
 
     het_samples, hom_samples = get_non_ref_samples(variant=var, samples=samples)
 
@@ -577,7 +590,7 @@ def create_structural_variant(var: cyvcf2.Variant, samples: list[str]):
     for cat in boolean_categories:
         info[cat] = info.get(cat, 0) == 1
 
-    return StructuralVariant(
+    return StructuralVariant.model_construct(
         coordinates=coordinates,
         info=info,
         het_samples=het_samples,
@@ -716,8 +729,9 @@ def read_json_from_path(read_path: str | None = None, default: Any = None, retur
         get_logger().error(f'{read_path} did not exist')
         return default
 
-    with read_anypath.open() as handle:
-        json_data = json.load(handle)
+    # parse with pydantic's own (Rust) JSON parser, which is considerably faster than json.load on large files
+    with read_anypath.open('rb') as handle:
+        json_data = from_json(handle.read())
         if return_model:
             # potentially walk-up model version
             model_data = lift_up_model_version(json_data, return_model)
@@ -725,6 +739,45 @@ def read_json_from_path(read_path: str | None = None, default: Any = None, retur
         return json_data
 
 
+@lru_cache(maxsize=256)
+def simplify_moi(input_moi: str, on_x: bool) -> str | None:
+    """
+    reduce a single PanelApp MOI string to one of the simplified MOIs
+    the range of PanelApp MOI strings is small and repeated across thousands of genes, so each is only parsed once
+
+    Args:
+        input_moi (str): one PanelApp MOI description
+        on_x (bool): whether the gene is on the X chromosome
+
+    Returns:
+        the simplified MOI, or None if this MOI can't be classified
+    """
+
+    simple_moi: str | None = None
+
+    # skip over ignore-able MOIs
+    if input_moi in IRRELEVANT_MOI:
+        return simple_moi
+
+    # split each PanelApp MOI into a list of strings
+    input_list = input_moi.translate(str.maketrans('', '', punctuation)).split()
+
+    # run a match: case to classify it
+    match input_list:
+        case ['biallelic', *_additional]:
+            simple_moi = 'Biallelic'
+        case ['both', *_additional]:
+            simple_moi = 'Mono_And_Biallelic'
+        case ['monoallelic', *_additional]:
+            simple_moi = 'Hemi_Mono_In_Female' if on_x else 'Monoallelic'
+        case ['xlinked', *additional] if 'biallelic' in additional:
+            simple_moi = 'Hemi_Bi_In_Female'
+        case ['xlinked', *_additional]:
+            simple_moi = 'Hemi_Mono_In_Female'
+
+    return simple_moi
+
+
 def get_simple_moi(input_mois: set[str], chrom: str) -> set[str]:
     """
     takes the vast range of PanelApp MOIs, and reduces to a
@@ -735,39 +788,13 @@ def get_simple_moi(input_mois: set[str], chrom: str) -> set[str]:
         chrom ():
     """
 
-    default = 'Hemi_Bi_In_Female' if chrom in X_CHROMOSOME else 'Biallelic'
+    on_x = chrom in X_CHROMOSOME
 
-    return_mois: set[str] = set()
-
-    for input_moi in input_mois:
-        # skip over ignore-able MOIs
-        if input_moi in IRRELEVANT_MOI:
-            continue
-
-        # split each PanelApp MOI into a list of strings
-        input_list = input_moi.translate(str.maketrans('', '', punctuation)).split()
-
-        # run a match: case to classify it
-        match input_list:
-            case ['biallelic', *_additional]:
-                return_mois.add('Biallelic')
-            case ['both', *_additional]:
-                return_mois.add('Mono_And_Biallelic')
-            case ['monoallelic', *_additional]:
-                if chrom in X_CHROMOSOME:
-                    return_mois.add('Hemi_Mono_In_Female')
-                else:
-                    return_mois.add('Monoallelic')
-            case ['xlinked', *additional] if 'biallelic' in additional:
-                return_mois.add('Hemi_Bi_In_Female')
-            case ['xlinked', *_additional]:
-                return_mois.add('Hemi_Mono_In_Female')
-            case _:
-                continue
+    return_mois: set[str] = {simple for input_moi in input_mois if (simple := simplify_moi(input_moi, on_x))}
 
     # adda default - solves the all-irrelevant or empty-input cases
     if not return_mois:
-        return_mois.add(default)
+        return_mois.add('Hemi_Bi_In_Female' if on_x else 'Biallelic')
 
     return return_mois
 
@@ -0,0 +1,132 @@
+"""
+tests for the report index page builder
+"""
+
+import pytest
+
+from talos.CPG.BuildReportIndexPage import (
+    Report,
+    bin_project_analyses,
+    collect_reports,
+    dedup_reports,
+    non_blank_lines,
+)
+
+
+@pytest.mark.parametrize(
+    'outputs',
+    [
+        'gs://cpg-cohort-main-web/reanalysis/2024-01-01/summary.html',
+        {'path': 'gs://cpg-cohort-main-web/reanalysis/2024-01-01/summary.html'},
+    ],
+)
+def test_bin_project_analyses_output_formats(outputs):
+    """
+    old analysis entries have a string output, newer entries have a dict with a path
+    """
+    binned = bin_project_analyses([{'meta': {'sequencing_type': 'genome'}, 'outputs': outputs}])
+    assert binned['genome'] == {
+        'latest': set(),
+        'general': 'gs://cpg-cohort-main-web/reanalysis/2024-01-01/summary.html',
+    }
+    assert binned['exome'] == {'latest': set(), 'general': None}
+
+
+@pytest.mark.parametrize(
+    'analysis',
+    [
+        {'meta': {'sequencing_type': 'genome'}, 'outputs': None},
+        {'meta': {'sequencing_type': 'genome'}, 'outputs': {}},
+        {'meta': {'sequencing_type': 'genome'}, 'outputs': {'path': None}},
+        {'meta': {'sequencing_type': 'transcriptome'}, 'outputs': 'gs://cpg-cohort-main-web/summary.html'},
+        {'meta': {}, 'outputs': 'gs://cpg-cohort-main-web/summary.html'},
+    ],
+)
+def test_bin_project_analyses_skipped(analysis):
+    """
+    entries without an output, or without an indexed sequencing type, are skipped
+    """
+    assert bin_project_analyses([analysis]) == {
+        'exome': {'latest': set(), 'general': None},
+        'genome': {'latest': set(), 'general': None},
+    }
+
+
+def test_bin_project_analyses_latest_and_general():
+    """
+    every latest report is kept, only the last general report is kept
+    """
+    analyses = [
+        {'meta': {'sequencing_type': 'exome'}, 'outputs': 'gs://cpg-cohort-main-web/2024-01-01/summary.html'},
+        {'meta': {'sequencing_type': 'exome'}, 'outputs': 'gs://cpg-cohort-main-web/2024-01-01/latest_1.html'},
+        {'meta': {'sequencing_type': 'exome'}, 'outputs': 'gs://cpg-cohort-main-web/2024-02-02/summary.html'},
+        {'meta': {'sequencing_type': 'exome'}, 'outputs': 'gs://cpg-cohort-main-web/2024-02-02/latest_2.html'},
+    ]
+    binned = bin_project_analyses(analyses)
+    assert binned['exome'] == {
+        'latest': {
+            'gs://cpg-cohort-main-web/2024-01-01/latest_1.html',
+            'gs://cpg-cohort-main-web/2024-02-02/latest_2.html',
+        },
+        'general': 'gs://cpg-cohort-main-web/2024-02-02/summary.html',
+    }
+    assert binned['genome'] == {'latest': set(), 'general': None}
+
+
+def test_dedup_reports_last_wins():
+    """
+    reports sharing a dataset and address are collapsed, keeping the last one seen
+    """
+    first = Report(dataset='a', address='url1', genome_or_exome='genome', date='2024-01-01', title='first')
+    other = Report(dataset='b', address='url1', genome_or_exome='genome', date='2024-01-01', title='other')
+    last = Report(dataset='a', address='url1', genome_or_exome='exome', date='2024-01-01', title='last')
+    assert dedup_reports([first, other, last]) == [last, other]
+
+
+def test_collect_reports(tmp_path):
+    """
+    general reports are found by globbing the folder, latest reports come straight from the analysis entries
+    """
+    report_dir = tmp_path / '2024-01-01'
+    report_dir.mkdir()
+    for name in ['summary.html', 'other.html', 'latest_genome.html', 'notes.txt']:
+        (report_dir / name).touch()
+    general_path = str(report_dir / 'summary.html')
+    latest_path = 'gs://cpg-cohort-main-web/2024-02-02/latest_genome.html'
+
+    general, latest = collect_reports(
+        {
+            'cohort': {
+                'genome': {'latest': {latest_path}, 'general': general_path},
+                'exome': {'latest': set(), 'general': None},
+            },
+        },
+    )
+    assert sorted(report.title for report in general) == ['other.html', 'summary.html']
+    assert all(report.date == '2024-01-01' and report.genome_or_exome == 'genome' for report in general)
+    assert latest == [
+        Report(
+            dataset='cohort',
+            address='https://main-web.populationgenomics.org.au/cohort/2024-02-02/latest_genome.html',
+            genome_or_exome='genome',
+            date='2024-02-02',
+            title='latest_genome.html',
+        ),
+    ]
+
+
+@pytest.mark.parametrize(
+    'chunks,expected',
+    [
+        (['line one\nline two\n'], ['line one', 'line two']),
+        (['line o', 'ne\nli', 'ne two'], ['line one', 'line two']),
+        (['one\n', '   \n\n', '\t', '\ntwo'], ['one', 'two']),
+        (['one\n', '  '], ['one']),
+        ([], []),
+    ],
+)
+def test_non_blank_lines(chunks, expected):
+    """
+    lines split across chunk boundaries are rejoined, whitespace-only lines are dropped
+    """
+    assert list(non_blank_lines(chunks)) == expected
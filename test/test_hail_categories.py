@@ -8,15 +8,19 @@ import hail as hl
 import pandas as pd
 import pytest
 
+from talos.data_model import BaseFields, Entry, SneakyTable, TXFields, VepVariant
 from talos.models import PanelApp
 from talos.RunHailFiltering import (
     annotate_category_1,
     annotate_category_3,
+    annotate_category_4,
     annotate_category_5,
     annotate_category_6,
     annotate_clinvarbitration,
+    annotate_row_categories,
     filter_to_categorised,
     filter_to_population_rare,
+    green_contig_intervals,
     green_from_panelapp,
     split_rows_by_gene_and_filter_to_green,
 )
@@ -79,6 +83,27 @@ def test_class_3_assignment(clinvar_talos, loftee, consequence_terms, classified
     assert anno_matrix.info.categoryboolean3.collect() == [classified]
 
 
+def test_category_4_joins_sorted_sample_ids(trio_ped, tmp_path):
+    """
+    both probands are de novo for the same variant - the IDs are joined in sorted order
+    the probands are deliberately listed out of order in the sample data
+    """
+    sample_data = {'PROBAND2': Entry('0/1'), 'PROBAND1': Entry('0/1')}
+    for parent in ['MOTHER1', 'FATHER1', 'MOTHER2', 'FATHER2']:
+        sample_data[parent] = Entry('0/0', ad=[30, 0])
+    v = VepVariant(
+        BaseFields('chr1:12345', alleles=['A', 'G']),
+        [TXFields('a', 'ensga', consequence_terms=['missense_variant'])],
+        sample_data=sample_data,
+    )
+    sample_schema = {sample: entry.get_schema_entry() for sample, entry in sample_data.items()}
+    matrix = SneakyTable([v], sample_details=sample_schema, tmp_path=str(tmp_path)).to_hail()
+    matrix = matrix.annotate_rows(info=matrix.info.annotate(gnomad_af=0.0, categoryboolean5=0))
+
+    matrix = annotate_category_4(matrix, trio_ped)
+    assert matrix.info.categorysample4.collect() == ['PROBAND1,PROBAND2']
+
+
 @pytest.mark.parametrize(
     'spliceai_score,flag',
     [(0.1, 0), (0.11, 0), (0.3, 0), (0.49, 0), (0.5, 1), (0.69, 1), (0.9, 1)],
@@ -119,6 +144,44 @@ def test_class_6_assignment(am_class, classified, make_a_mt):
     assert anno_matrix.info.categoryboolean6.collect() == [classified]
 
 
+@pytest.mark.parametrize(
+    'strong,clinvar_talos,loftee,splice_ai,am_class,expected',
+    [
+        (0, 0, 'lc', 0.1, 'not_pathogenic', [0, 0, 0, 0]),
+        (1, 0, 'lc', 0.1, 'not_pathogenic', [1, 0, 0, 0]),
+        (0, 0, 'HC', 0.1, 'not_pathogenic', [0, 1, 0, 0]),
+        (0, 1, 'lc', 0.1, 'not_pathogenic', [0, 1, 0, 0]),
+        (0, 0, 'lc', 0.9, 'not_pathogenic', [0, 0, 1, 0]),
+        (0, 0, 'lc', 0.1, 'likely_pathogenic', [0, 0, 0, 1]),
+        (1, 1, 'HC', 0.9, 'likely_pathogenic', [1, 1, 1, 1]),
+    ],
+)
+def test_annotate_row_categories(strong, clinvar_talos, loftee, splice_ai, am_class, expected, make_a_mt):
+    """
+    the fused annotation should match each of the single-category methods
+    """
+    anno_matrix = make_a_mt.annotate_rows(
+        info=make_a_mt.info.annotate(
+            clinvar_talos_strong=strong,
+            clinvar_talos=clinvar_talos,
+            splice_ai_delta=splice_ai,
+        ),
+        vep=hl.Struct(
+            transcript_consequences=hl.array(
+                [hl.Struct(consequence_terms=hl.set(['frameshift_variant']), lof=loftee, am_class=am_class)],
+            ),
+        ),
+    )
+
+    anno_matrix = annotate_row_categories(anno_matrix)
+    assert [
+        anno_matrix.info.categoryboolean1.collect()[0],
+        anno_matrix.info.categoryboolean3.collect()[0],
+        anno_matrix.info.categoryboolean5.collect()[0],
+        anno_matrix.info.categoryboolean6.collect()[0],
+    ] == expected
+
+
 def annotate_c6_missing(make_a_mt, caplog):
     """
     test what happens if the am_class attribute is missing
@@ -156,6 +219,30 @@ def test_green_from_panelapp():
     assert sorted(green_expression.collect()[0]) == ['ENSG00ABCD', 'ENSG00EFGH', 'ENSG00IJKL']
 
 
+@pytest.mark.parametrize(
+    'chroms,contigs',
+    [
+        [['1', '1', 'X'], ['chr1', 'chrX']],
+        [['MT', '2'], ['chr2', 'chrM']],
+        [['1', ''], None],
+        [['1', 'HLA'], None],
+    ],
+)
+def test_green_contig_intervals(chroms: list[str], contigs: list[str] | None):
+    """
+    whole-contig intervals are only generated if every gene has a recognised contig
+    """
+    panelapp = PanelApp.model_validate(
+        {'genes': {f'ENSG{index}': {'symbol': f'G{index}', 'chrom': chrom} for index, chrom in enumerate(chroms)}},
+    )
+    intervals = green_contig_intervals(panelapp)
+    if contigs is None:
+        assert intervals is None
+    else:
+        assert [interval.start.contig for interval in intervals] == contigs
+        assert all(interval.start.position == 1 for interval in intervals)
+
+
 @pytest.mark.parametrize(
     'exomes,genomes,clinvar,svdb,exomiser,length',
     [
@@ -250,6 +337,32 @@ def test_filter_to_green_genes_and_split__consequence(make_a_mt):
     assert matrix.count_rows() == 1
 
 
+def test_filter_to_green_genes_and_split__multi_gene(make_a_mt):
+    """
+    a variant in two green genes is split onto two rows, each holding only its own gene's transcripts
+    """
+
+    green_genes = hl.literal({'green', 'also_green'})
+    anno_matrix = make_a_mt.annotate_rows(
+        geneIds=green_genes,
+        vep=hl.Struct(
+            transcript_consequences=hl.array(
+                [
+                    hl.Struct(gene_id='green', biotype='protein_coding', mane_select=''),
+                    hl.Struct(gene_id='also_green', biotype='protein_coding', mane_select=''),
+                    hl.Struct(gene_id='also_green', biotype='snRNA', mane_select=''),
+                    hl.Struct(gene_id='also_green', biotype='non_coding', mane_select=''),
+                ],
+            ),
+        ),
+    )
+    matrix = split_rows_by_gene_and_filter_to_green(anno_matrix, green_genes)
+    tx_genes = matrix.aggregate_rows(
+        hl.agg.collect((matrix.geneIds, matrix.vep.transcript_consequences.map(lambda x: x.gene_id))),
+    )
+    assert sorted(tx_genes) == [('also_green', ['also_green', 'also_green']), ('green', ['green'])]
+
+
 @pytest.mark.parametrize(
     'one,three,four,five,six,pm5,svdb,exomiser,length',
     [
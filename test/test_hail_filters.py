@@ -5,7 +5,13 @@ unit testing collection for the hail MT methods
 import hail as hl
 import pytest
 
-from talos.RunHailFiltering import filter_matrix_by_ac, filter_on_quality_flags, filter_to_well_normalised
+from talos.RunHailFiltering import (
+    drop_useless_fields,
+    filter_matrix_by_ac,
+    filter_on_quality_flags,
+    filter_rare_and_high_quality,
+    filter_to_well_normalised,
+)
 
 
 @pytest.mark.parametrize(  # needs clinvar
@@ -101,3 +107,52 @@ def test_filter_to_well_normalised(alleles, length, make_a_mt):
     anno_matrix = make_a_mt.key_rows_by('locus')
     anno_matrix = anno_matrix.annotate_rows(alleles=alleles)
     assert filter_to_well_normalised(anno_matrix).count_rows() == length
+
+
+@pytest.mark.parametrize(
+    'af,filters,ac,an,clinvar,svdb,exomiser,length',
+    [
+        (0.0, hl.empty_set(hl.tstr), [1], 100, 0, 0, 'missing', 1),
+        (1.0, hl.empty_set(hl.tstr), [1], 100, 0, 0, 'missing', 0),
+        (0.0, hl.literal({'fail'}), [1], 100, 0, 0, 'missing', 0),
+        (0.0, hl.empty_set(hl.tstr), [50], 50, 0, 0, 'missing', 0),
+        (1.0, hl.literal({'fail'}), [50], 50, 1, 0, 'missing', 1),
+        (1.0, hl.literal({'fail'}), [50], 50, 0, 1, 'missing', 1),
+        (1.0, hl.literal({'fail'}), [50], 50, 0, 0, 'present', 1),
+    ],
+)
+def test_filter_rare_and_high_quality(
+    af: float,
+    filters: hl.set,
+    ac: list[int],
+    an: int,
+    clinvar: int,
+    svdb: int,
+    exomiser: str,
+    length: int,
+    make_a_mt: hl.MatrixTable,
+):
+    """
+    the combined filter removes a variant failing any one test, unless overridden
+    """
+    anno_matrix = make_a_mt.annotate_rows(
+        filters=filters,
+        gnomad_genomes=hl.Struct(AF=af),
+        gnomad_exomes=hl.Struct(AF=af),
+        info=make_a_mt.info.annotate(
+            AC=ac,
+            AN=an,
+            clinvar_talos=clinvar,
+            categorybooleansvdb=svdb,
+            categorydetailsexomiser=exomiser,
+        ),
+    )
+    assert filter_rare_and_high_quality(anno_matrix).count_rows() == length
+
+
+def test_drop_useless_fields(make_a_mt: hl.MatrixTable):
+    """
+    unused entry fields are dropped, fields used for de novo calling or VCF export are retained
+    """
+    anno_matrix = make_a_mt.annotate_entries(AB=hl.float64(0.5), MIN_DP=hl.int32(10))
+    assert list(drop_useless_fields(anno_matrix).entry) == ['GT', 'AD', 'DP', 'GQ', 'PL', 'PS']
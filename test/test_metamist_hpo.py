@@ -5,7 +5,7 @@ test file for metamist panel-participant matching
 import networkx as nx
 from obonet import read_obo
 
-from talos.GeneratePanelData import get_panels, match_hpos_to_panels, match_participants_to_panels
+from talos.GeneratePanelData import get_panels, match_hpos_to_panels, match_participants_to_panels, panels_for_term
 from talos.models import ParticipantHPOPanels, PhenotypeMatchedPanels
 
 
@@ -18,6 +18,23 @@ def test_get_panels(httpx_mock, fake_panelapp_overview):
     assert panels_parsed == {'HP:1': {2}, 'HP:4': {1}, 'HP:6': {2}}
 
 
+def test_get_panels_paged(httpx_mock):
+    """
+    remaining pages are derived from the first page's count and 'next' link
+    """
+    base = 'https://panelapp.agha.umccr.org/api/v1/panels/'
+    for page, hpo in [(1, 'HP:1'), (2, 'HP:2'), (3, 'HP:3')]:
+        httpx_mock.add_response(
+            url=base if page == 1 else f'{base}?page={page}',
+            json={
+                'count': 3,
+                'next': f'{base}?page=2' if page == 1 else None,
+                'results': [{'id': page, 'relevant_disorders': [hpo]}],
+            },
+        )
+    assert get_panels(base) == {'HP:1': {1}, 'HP:2': {2}, 'HP:3': {3}}
+
+
 def test_match_hpos_to_panels(fake_obo_path):
     """
     test the hpo-to-panel matching
@@ -35,6 +52,9 @@ def test_match_hpos_to_panels(fake_obo_path):
         'HP:7a': {1, 2, 5},
     }
 
+    # an obsolete term picks up the panels of its replacement
+    assert match_hpos_to_panels(panel_map, fake_obo_path, all_hpos={'HP:8'}) == {'HP:8': {1, 2, 5}}
+
 
 def test_read_hpo_tree(fake_obo_path):
     """
@@ -90,3 +110,17 @@ def test_match_participants_to_panels():
         hpo_terms=[{'id': 'HP:1', 'label': ''}, {'id': 'HP:6', 'label': ''}],
         panels={137, 101, 102, 666},
     )
+
+
+def test_panels_for_term_shared_ancestors():
+    """
+    every ancestor is reached, including one only reachable via an already-visited term, and is resolved once
+    """
+    graph = nx.MultiDiGraph()
+    # HP:A is the root, HP:B and HP:C both sit under it, HP:D under both of those
+    graph.add_edges_from([('HP:B', 'HP:A'), ('HP:C', 'HP:A'), ('HP:D', 'HP:B'), ('HP:D', 'HP:C')])
+    panel_map = {'HP:A': {1}, 'HP:C': {3}}
+    cache: dict = {}
+    assert panels_for_term(graph, panel_map, 'HP:D', cache) == {1, 3}
+    assert cache == {'HP:A': {1}, 'HP:B': {1}, 'HP:C': {1, 3}, 'HP:D': {1, 3}}
+    assert panels_for_term(graph, panel_map, 'HP:B', cache) == {1}
@@ -5,7 +5,7 @@ any methods for testing model functionality
 from os.path import join
 from test.test_utils import FIVE_EXPECTED, ONE_EXPECTED, THREE_EXPECTED
 
-from talos.models import PhenotypeMatchedPanels
+from talos.models import Coordinates, PhenotypeMatchedPanels
 from talos.utils import make_flexible_pedigree
 
 
@@ -58,3 +58,27 @@ def test_flexi_pedigree_no_packets(test_input_path):
     # this has no HPO terms
     assert len(flexi_ped.by_id['CPGABC5'].hpo_terms) == 0
     assert flexi_ped.by_id['CPGABC5'].family == 'FAM3'
+
+
+def test_coordinates_sorting():
+    """
+    canonical contigs sort in CHROM_ORDER, then non-canonical contigs by name, each by position
+    """
+    coords = [
+        Coordinates(chrom='HLA-A', pos=5, ref='A', alt='C'),
+        Coordinates(chrom='X', pos=1, ref='A', alt='C'),
+        Coordinates(chrom='10', pos=1, ref='A', alt='C'),
+        Coordinates(chrom='2', pos=20, ref='A', alt='C'),
+        Coordinates(chrom='2', pos=10, ref='A', alt='C'),
+        Coordinates(chrom='GL000', pos=1, ref='A', alt='C'),
+    ]
+    assert [coord.string_format for coord in sorted(coords)] == [
+        '2-10-A-C',
+        '2-20-A-C',
+        '10-1-A-C',
+        'X-1-A-C',
+        'GL000-1-A-C',
+        'HLA-A-5-A-C',
+    ]
+    assert coords[1] > coords[2]
+    assert len({coords[0], Coordinates(chrom='HLA-A', pos=5, ref='A', alt='C')}) == 1
@@ -5,7 +5,8 @@ tests for the PanelApp parser
 from copy import deepcopy
 
 from talos.models import PanelApp, PanelDetail
-from talos.QueryPanelapp import get_best_moi, get_panel, parse_panel_activity
+from talos.QueryPanelapp import get_best_moi, get_panel, main, parse_panel_activity
+from talos.utils import read_json_from_path
 
 empty_gene_dict = PanelApp(genes={})
 
@@ -196,3 +197,21 @@ def test_get_best_moi_x():
     }
     get_best_moi(d)
     assert d['ensg1'].moi == 'Hemi_Mono_In_Female'
+
+
+def test_main_queries_all_panels(latest_mendeliome, latest_incidentalome, httpx_mock, tmp_path):
+    """
+    check that the base panel and the forced panel (99, from config) are both queried and integrated, in order
+    """
+
+    httpx_mock.add_response(url='https://panelapp.agha.umccr.org/api/v1/panels/137/', json=latest_mendeliome)
+    httpx_mock.add_response(url='https://panelapp.agha.umccr.org/api/v1/panels/137/activities/', json=[])
+    httpx_mock.add_response(url='https://panelapp.agha.umccr.org/api/v1/panels/99/', json=latest_incidentalome)
+    httpx_mock.add_response(url='https://panelapp.agha.umccr.org/api/v1/panels/99/activities/', json=[])
+
+    out_path = str(tmp_path / 'panelapp.json')
+    main(panels=None, out_path=out_path)
+
+    result = read_json_from_path(out_path, return_model=PanelApp)
+    assert [panel.id for panel in result.metadata] == [137, 99]
+    assert result.genes['ENSG00ABCD'].panels == {137, 99}